@@ -0,0 +1,124 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+
+logger = get_logger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests on an asyncio queue and scores
+    them together: a batch is flushed when it reaches max_batch_size or when
+    its oldest request has waited max_wait_ms.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[dict]], List[float]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 10000
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        logger.info(
+            f"Starting micro-batcher (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000})"
+        )
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        # scoring runs off the event loop so requests keep being queued meanwhile
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="micro-batcher")
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        logger.info("Stopping micro-batcher")
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    async def submit(self, record: dict) -> float:
+        """
+        Queues one record and waits for its prediction.
+        Raises asyncio.QueueFull when the queue is at capacity.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((record, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    def _score(self, records: list) -> list:
+        """
+        Scores the batch in one call; if that fails, scores records one by
+        one so a single bad record only fails its own request
+        """
+        try:
+            return self.predict_fn(records)
+        except CustomException:
+            logger.warning(f"Batch of {len(records)} failed, retrying records individually")
+
+        results = []
+        for record in records:
+            try:
+                results.append(self.predict_fn([record])[0])
+            except CustomException as e:
+                results.append(e)
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # drop requests whose clients already went away
+            batch = [(record, future) for record, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, self._score, [record for record, _ in batch]
+                )
+            except Exception as e:
+                results = [CustomException(e, sys)] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,39 @@
+from time import perf_counter
+
+from src.utils.metrics import HTTP_REQUESTS, HTTP_SECONDS
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware counting HTTP requests by route template and
+    status code and timing them. Unlike BaseHTTPMiddleware it does not wrap
+    the request or response bodies, so it adds only a few microseconds.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # the router records the matched route in the scope; unmatched paths
+            # share one label so arbitrary URLs cannot grow the label set
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, path, str(status)).inc()
+            HTTP_SECONDS.labels(method, path).observe(perf_counter() - start)
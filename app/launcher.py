@@ -0,0 +1,351 @@
+import argparse
+import gc
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import time
+
+from src.utils.config import MetricsConfig, ServingConfig
+from src.utils.exception import CustomException
+from src.utils.logger import get_logger, share_log_writer, shutdown_logging
+
+logger = get_logger(__name__)
+
+# thread pools sized from these at import; set before NumPy / sklearn load
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS", "NUMEXPR_NUM_THREADS",
+)
+
+# a worker that dies sooner than this after starting is restarted with a backoff,
+# doubling from MIN_RESTART_DELAY_SECONDS while it keeps dying young
+MIN_WORKER_UPTIME_SECONDS = 5.0
+MIN_RESTART_DELAY_SECONDS = 1.0
+MAX_RESTART_DELAY_SECONDS = 30.0
+
+
+def pin_thread_env(threads: int):
+    """
+    Caps BLAS / OpenMP thread pools of this process and its children.
+    Only effective before NumPy is imported.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+
+class PreforkLauncher:
+    """
+    Serves app.main with N forked uvicorn workers sharing one listening socket.
+
+    The parent imports app.main, which loads full_pipeline.pkl, and freezes
+    the garbage collector before forking. The fitted arrays (RandomForest
+    trees included) are then shared copy-on-write by all workers instead of
+    being loaded N times. Each worker caps its BLAS / OpenMP / joblib
+    threads, so N workers use about N * threads_per_worker cores.
+
+    Signals to the parent:
+        SIGHUP           reload the artifact in the parent (with a canary),
+                         then replace the workers one at a time
+        SIGTERM, SIGINT  stop the workers gracefully and exit
+    Workers that exit unexpectedly are restarted.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        threads_per_worker: int = 1,
+        graceful_timeout: float = 30.0,
+        startup_timeout: float = 60.0,
+        mmap: bool = False
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.graceful_timeout = graceful_timeout
+        self.startup_timeout = startup_timeout
+        self.mmap = mmap
+        self.metrics_config = MetricsConfig()
+
+        self.service = None
+        self.socket = None
+        # pid -> (worker index, start time)
+        self.children = {}
+        self.retiring = set()
+        self.restart_delay = {}
+        # worker index -> monotonic time its restart is due
+        self.pending_restarts = {}
+        self._stopping = False
+        self._reload_requested = False
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _load_service(self):
+        # importing app.main loads the pipeline in the parent, before any fork
+        from app import main as service
+
+        if self.mmap and service.prediction_pipeline.config.mmap_mode is None:
+            service.prediction_pipeline.config.mmap_mode = "r"
+            service.prediction_pipeline.reload_pipeline()
+
+        self.service = service
+        self._prepare_for_fork()
+
+    def _prepare_for_fork(self):
+        pipeline = self.service.prediction_pipeline.pipeline
+        model = pipeline.steps[-1][1] if hasattr(pipeline, "steps") else pipeline
+        # compact artifacts have no sklearn model to pin
+        if model is not None and "n_jobs" in model.get_params():
+            model.set_params(n_jobs=self.threads_per_worker)
+
+        # objects alive now are moved out of the collector's generations, so
+        # collections in the workers don't write to (and un-share) their pages
+        gc.collect()
+        gc.freeze()
+
+    def _worker_main(self, index: int, ready_fd: int):
+        import uvicorn
+        from threadpoolctl import threadpool_limits
+        from src.utils.metrics import REGISTRY
+
+        # uvicorn installs its own SIGINT / SIGTERM handlers for the graceful
+        # shutdown and raises the signal again once it is done: ignore it then
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+        threadpool_limits(limits=self.threads_per_worker)
+
+        # whichever worker answers the scrape reports the totals of all of them
+        pid = os.getpid()
+        if REGISTRY.enabled:
+            REGISTRY.enable_multiprocess(
+                self.metrics_config.multiprocess_dir, index, self.metrics_config.snapshot_seconds
+            )
+        REGISTRY.register_collector(lambda: [(
+            "house_price_worker_info", "gauge", "Live worker processes",
+            [({"worker": index, "pid": pid}, 1)]
+        )])
+
+        class NotifyingServer(uvicorn.Server):
+            async def startup(self, sockets=None):
+                await super().startup(sockets=sockets)
+                os.write(ready_fd, b"1")
+                os.close(ready_fd)
+
+        config = uvicorn.Config(
+            self.service.app,
+            lifespan="on",
+            log_config=None,
+            access_log=False,
+            timeout_graceful_shutdown=self.graceful_timeout
+        )
+        logger.info(f"Worker {index} (pid {pid}) serving on {self.host}:{self.port}")
+        NotifyingServer(config).run(sockets=[self.socket])
+        # the last requests' counts, kept in the totals after this worker exits
+        REGISTRY.write_snapshot()
+        logger.info(f"Worker {index} (pid {pid}) stopped")
+
+    def _spawn(self, index: int) -> tuple:
+        """
+        Forks worker `index`.
+
+        Returns:
+            tuple: (pid, file descriptor that becomes readable once the worker serves)
+        """
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                os.close(read_fd)
+                self._worker_main(index, write_fd)
+            except BaseException as e:
+                logger.error(f"Worker {index} failed: {e}")
+                code = 1
+            finally:
+                shutdown_logging()
+                os._exit(code)
+
+        os.close(write_fd)
+        self.children[pid] = (index, time.monotonic())
+        return pid, read_fd
+
+    def _wait_ready(self, pid: int, read_fd: int) -> bool:
+        try:
+            readable, _, _ = select.select([read_fd], [], [], self.startup_timeout)
+            return bool(readable) and os.read(read_fd, 1) == b"1"
+        except InterruptedError:
+            return False
+        finally:
+            os.close(read_fd)
+
+    def _start_worker(self, index: int) -> int:
+        pid, read_fd = self._spawn(index)
+        if self._wait_ready(pid, read_fd):
+            logger.info(f"Worker {index} ready (pid {pid})")
+        else:
+            logger.warning(f"Worker {index} (pid {pid}) did not report ready")
+        return pid
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            index, started = self.children.pop(pid, (None, None))
+            if index is None:
+                continue
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if self._stopping:
+                continue
+
+            uptime = time.monotonic() - started
+            if uptime < MIN_WORKER_UPTIME_SECONDS:
+                previous = self.restart_delay.get(index)
+                delay = MIN_RESTART_DELAY_SECONDS if previous is None else min(2 * previous, MAX_RESTART_DELAY_SECONDS)
+                self.restart_delay[index] = delay
+            else:
+                # it had been healthy: a later crash loop starts from the minimum again
+                self.restart_delay.pop(index, None)
+                delay = 0.0
+            logger.error(
+                f"Worker {index} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, "
+                f"restarting in {delay:.1f}s"
+            )
+            # started from the main loop when due, so signals are not held up meanwhile
+            self.pending_restarts[index] = time.monotonic() + delay
+
+    def _start_due_workers(self):
+        now = time.monotonic()
+        for index, due in list(self.pending_restarts.items()):
+            if self._stopping:
+                return
+            if due <= now:
+                del self.pending_restarts[index]
+                self._start_worker(index)
+
+    def _rolling_restart(self):
+        try:
+            version = self.service.prediction_pipeline.reload_pipeline()
+            logger.info(f"Parent reloaded pipeline version {version}")
+        except CustomException as e:
+            logger.error(f"Reload failed, restarting workers on the current pipeline: {e}")
+        self._prepare_for_fork()
+
+        # one worker at a time: the others keep accepting on the shared socket
+        for old_pid, (index, _) in list(self.children.items()):
+            if self._stopping:
+                return
+            self._start_worker(index)
+            self._terminate(old_pid)
+
+    def _terminate(self, pid: int):
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _stop(self):
+        logger.info("Stopping workers")
+        self.pending_restarts.clear()
+        for pid in list(self.children):
+            self._terminate(pid)
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            logger.warning(f"Worker pid {pid} did not stop in time, killing it")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.children.pop(pid, None)
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def run(self):
+        try:
+            self.socket = self._bind()
+            # workers send their records to this process's writer: one file, one rotation
+            share_log_writer()
+            # metric snapshots of a previous run would be added to this one's totals
+            shutil.rmtree(self.metrics_config.multiprocess_dir, ignore_errors=True)
+            self._load_service()
+            logger.info(
+                f"Starting {self.workers} workers on {self.host}:{self.port} "
+                f"({self.threads_per_worker} threads each)"
+            )
+
+            signal.signal(signal.SIGTERM, self._handle_stop)
+            signal.signal(signal.SIGINT, self._handle_stop)
+            signal.signal(signal.SIGHUP, self._handle_reload)
+
+            for index in range(self.workers):
+                self._start_worker(index)
+
+            while not self._stopping:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._rolling_restart()
+                self._reap()
+                self._start_due_workers()
+                time.sleep(0.1 if self.pending_restarts else 0.5)
+
+            self._stop()
+            logger.info("Launcher stopped")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+        finally:
+            if self.socket is not None:
+                self.socket.close()
+
+
+def parse_args(argv=None):
+    config = ServingConfig()
+    parser = argparse.ArgumentParser(description="Pre-fork multi-process server for the prediction API")
+    parser.add_argument("--host", default=config.host)
+    parser.add_argument("--port", type=int, default=config.port)
+    parser.add_argument("--workers", type=int, default=config.workers or os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=config.threads_per_worker)
+    parser.add_argument("--graceful-timeout", type=float, default=config.graceful_timeout_seconds)
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the artifact's arrays (PredictionConfig.mmap_mode='r')")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    pin_thread_env(args.threads_per_worker)
+    PreforkLauncher(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        graceful_timeout=args.graceful_timeout,
+        mmap=args.mmap
+    ).run()
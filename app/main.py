@@ -1,25 +1,128 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import ValidationError
+from app.batching import MicroBatcher
+from app.instrumentation import MetricsMiddleware
 from app.schema import HouseInput
 from pipeline.prediction_pipeline import PredictionPipeline
-
-app = FastAPI(
-    title="House Price Prediction API",
-    version="1.0"
-)
+from src.utils.config import ServingConfig
+from src.utils.metrics import REGISTRY
+from src.utils.exception import CustomException
 
 # Load pipeline once (IMPORTANT)
 prediction_pipeline = PredictionPipeline()
 prediction_pipeline.load_pipeline()
 
+serving_config = ServingConfig()
+REGISTRY.register_collector(prediction_pipeline.metrics)
+
+batcher = None
+if serving_config.micro_batching:
+    batcher = MicroBatcher(
+        prediction_pipeline.predict_batch,
+        max_batch_size=serving_config.max_batch_size,
+        max_wait_ms=serving_config.max_wait_ms,
+        max_queue_size=serving_config.max_queue_size
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if batcher is not None:
+        await batcher.start()
+    if serving_config.watch_model:
+        prediction_pipeline.start_model_watcher(serving_config.watch_interval_seconds)
+    yield
+    prediction_pipeline.stop_model_watcher()
+    if batcher is not None:
+        await batcher.stop()
+
+
+app = FastAPI(
+    title="House Price Prediction API",
+    version="1.0",
+    lifespan=lifespan
+)
+if REGISTRY.enabled:
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.get("/")
 def health_check():
-    return {"status": "API is running"}
+    response = {
+        "status": "API is running",
+        "model": prediction_pipeline.model_info()
+    }
+    if prediction_pipeline.cache is not None:
+        response["cache"] = prediction_pipeline.cache.stats()
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    if not REGISTRY.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/admin/reload")
+async def reload_model():
+    # loads and canaries the new artifact off the event loop; requests keep
+    # being served by the current pipeline until the swap
+    try:
+        await run_in_threadpool(prediction_pipeline.reload_pipeline)
+    except CustomException as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "reloaded",
+        "model": prediction_pipeline.model_info()
+    }
 
 
 @app.post("/predict")
-def predict_price(data: HouseInput):
-    prediction = prediction_pipeline.predict_results(data.dict(by_alias=True))
+async def predict_price(data: HouseInput):
+    record = data.dict(by_alias=True)
+    if batcher is None:
+        prediction = await run_in_threadpool(prediction_pipeline.predict_results, record)
+    else:
+        try:
+            prediction = await batcher.submit(record)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Prediction queue is full")
     return {
         "predicted_price": prediction
     }
+
+
+@app.post("/predict/batch")
+def predict_price_batch(records: List[Dict[str, Any]]):
+    max_batch_size = prediction_pipeline.config.max_batch_size
+    if len(records) > max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(records)} exceeds limit of {max_batch_size}"
+        )
+
+    results = [{"predicted_price": None, "error": None} for _ in records]
+
+    # validate each record on its own so one bad row doesn't fail the batch
+    valid_indices, valid_records = [], []
+    for i, record in enumerate(records):
+        try:
+            valid_records.append(HouseInput(**record).dict(by_alias=True))
+            valid_indices.append(i)
+        except ValidationError as e:
+            results[i]["error"] = str(e)
+
+    predictions = prediction_pipeline.predict_batch(valid_records)
+    for i, prediction in zip(valid_indices, predictions):
+        results[i]["predicted_price"] = prediction
+
+    return {
+        "predictions": results
+    }
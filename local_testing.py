@@ -7,6 +7,7 @@ from src.outlier_handling import OutlierHandler
 from src.model_training import ModelTrainer
 from src.model_selection import ModelSelector
 from src.model_evaluation import ModelEvaluation
+from src.utils.columnar import read_table
 import pandas as pd
 import numpy as np
 
@@ -44,8 +45,8 @@ if __name__ == "__main__":
     print("Testing Feature Engineering...")
     print("="*50)
     
-    train_df = pd.read_csv(train_path)
-    test_df = pd.read_csv(test_path)
+    train_df = read_table(train_path)
+    test_df = read_table(test_path)
     
     feature_eng = FeatureEngineering()
     train_df_fe = feature_eng.start_feature_engineering(train_df)
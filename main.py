@@ -0,0 +1,9 @@
+"""
+Production entry point: pre-forks uvicorn workers that share the loaded
+pipeline (see app/launcher.py). Run `python main.py --help` for the options.
+"""
+from app.launcher import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+"""
+End-to-end performance benchmark on synthetic Ames-shaped data.
+
+    python -m pipeline.benchmark --scales 1 10 100
+    python -m pipeline.benchmark --scales 10 --compare artifacts/reports/benchmarks/<previous>.json
+
+Every scale trains the full TrainingPipeline on scale x 2930 synthetic rows
+in a scratch workspace, then benchmarks the serving path against the trained
+artifacts. Training and inference run in separate child processes, so each
+reports its own peak RSS and the repo's artifacts are never touched.
+Results are written as JSON for comparison between commits.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import resource
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+
+logger = get_logger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# rows in the original Ames dataset; --scales multiplies it
+AMES_ROWS = 2930
+
+QUALITY = ("TA", "Gd", "Ex", "Fa", "Po")
+
+
+def _num(name, low, high, missing=0.0, zeros=0.0, dtype="int"):
+    return {"name": name, "low": low, "high": high, "missing": missing, "zeros": zeros, "dtype": dtype}
+
+
+def _cat(name, levels, missing=0.0):
+    return {"name": name, "levels": levels, "missing": missing}
+
+
+# Ames column order, value ranges, category levels (most frequent first)
+# and missing rates. Order, PID and SalePrice are generated separately.
+AMES_SCHEMA = (
+    _num("MS SubClass", 20, 190),
+    _cat("MS Zoning", ("RL", "RM", "FV", "RH", "C (all)", "I (all)", "A (agr)")),
+    _num("Lot Frontage", 21, 313, missing=0.17, dtype="float"),
+    _num("Lot Area", 1300, 30000),
+    _cat("Street", ("Pave", "Grvl")),
+    _cat("Alley", ("Grvl", "Pave"), missing=0.93),
+    _cat("Lot Shape", ("Reg", "IR1", "IR2", "IR3")),
+    _cat("Land Contour", ("Lvl", "HLS", "Bnk", "Low")),
+    _cat("Utilities", ("AllPub", "NoSewr", "NoSeWa")),
+    _cat("Lot Config", ("Inside", "Corner", "CulDSac", "FR2", "FR3")),
+    _cat("Land Slope", ("Gtl", "Mod", "Sev")),
+    _cat("Neighborhood", (
+        "NAmes", "CollgCr", "OldTown", "Edwards", "Somerst", "NridgHt", "Gilbert",
+        "Sawyer", "NWAmes", "SawyerW", "Mitchel", "BrkSide", "Crawfor", "IDOTRR",
+        "Timber", "NoRidge", "StoneBr", "SWISU", "ClearCr", "MeadowV", "BrDale",
+        "Blmngtn", "Veenker", "NPkVill", "Blueste", "Greens", "GrnHill", "Landmrk",
+    )),
+    _cat("Condition 1", ("Norm", "Feedr", "Artery", "RRAn", "PosN", "RRAe", "PosA", "RRNn", "RRNe")),
+    _cat("Condition 2", ("Norm", "Feedr", "Artery", "PosN", "PosA", "RRNn", "RRAn", "RRAe")),
+    _cat("Bldg Type", ("1Fam", "TwnhsE", "Duplex", "Twnhs", "2fmCon")),
+    _cat("House Style", ("1Story", "2Story", "1.5Fin", "SLvl", "SFoyer", "2.5Unf", "1.5Unf", "2.5Fin")),
+    _num("Overall Qual", 1, 10),
+    _num("Overall Cond", 1, 9),
+    _num("Year Built", 1872, 2010),
+    _num("Year Remod/Add", 1950, 2010),
+    _cat("Roof Style", ("Gable", "Hip", "Gambrel", "Flat", "Mansard", "Shed")),
+    _cat("Roof Matl", ("CompShg", "Tar&Grv", "WdShake", "WdShngl", "Membran", "ClyTile", "Metal", "Roll")),
+    _cat("Exterior 1st", (
+        "VinylSd", "MetalSd", "HdBoard", "Wd Sdng", "Plywood", "CemntBd", "BrkFace", "WdShing",
+        "AsbShng", "Stucco", "BrkComm", "AsphShn", "Stone", "CBlock", "ImStucc", "PreCast",
+    )),
+    _cat("Exterior 2nd", (
+        "VinylSd", "MetalSd", "HdBoard", "Wd Sdng", "Plywood", "CmentBd", "Wd Shng", "BrkFace",
+        "Stucco", "AsbShng", "Brk Cmn", "ImStucc", "AsphShn", "Stone", "Other", "CBlock", "PreCast",
+    )),
+    _cat("Mas Vnr Type", ("None", "BrkFace", "Stone", "BrkCmn", "CBlock"), missing=0.01),
+    _num("Mas Vnr Area", 0, 1600, missing=0.01, zeros=0.6, dtype="float"),
+    _cat("Exter Qual", QUALITY[:4]),
+    _cat("Exter Cond", QUALITY),
+    _cat("Foundation", ("PConc", "CBlock", "BrkTil", "Slab", "Stone", "Wood")),
+    _cat("Bsmt Qual", QUALITY, missing=0.03),
+    _cat("Bsmt Cond", QUALITY, missing=0.03),
+    _cat("Bsmt Exposure", ("No", "Av", "Gd", "Mn"), missing=0.03),
+    _cat("BsmtFin Type 1", ("GLQ", "Unf", "ALQ", "Rec", "BLQ", "LwQ"), missing=0.03),
+    _num("BsmtFin SF 1", 0, 2300, zeros=0.3),
+    _cat("BsmtFin Type 2", ("Unf", "Rec", "LwQ", "BLQ", "ALQ", "GLQ"), missing=0.03),
+    _num("BsmtFin SF 2", 0, 1500, zeros=0.88),
+    _num("Bsmt Unf SF", 0, 2300, zeros=0.08),
+    _num("Total Bsmt SF", 0, 3200, zeros=0.03),
+    _cat("Heating", ("GasA", "GasW", "Grav", "Wall", "OthW", "Floor")),
+    _cat("Heating QC", ("Ex", "TA", "Gd", "Fa", "Po")),
+    _cat("Central Air", ("Y", "N")),
+    _cat("Electrical", ("SBrkr", "FuseA", "FuseF", "FuseP", "Mix")),
+    _num("1st Flr SF", 334, 3000),
+    _num("2nd Flr SF", 0, 1900, zeros=0.57),
+    _num("Low Qual Fin SF", 0, 1000, zeros=0.99),
+    _num("Gr Liv Area", 334, 4500),
+    _num("Bsmt Full Bath", 0, 3),
+    _num("Bsmt Half Bath", 0, 2),
+    _num("Full Bath", 0, 4),
+    _num("Half Bath", 0, 2),
+    _num("Bedroom AbvGr", 0, 6),
+    _num("Kitchen AbvGr", 0, 3),
+    _cat("Kitchen Qual", QUALITY),
+    _num("TotRms AbvGrd", 2, 14),
+    _cat("Functional", ("Typ", "Min2", "Min1", "Mod", "Maj1", "Maj2", "Sev", "Sal")),
+    _num("Fireplaces", 0, 4),
+    _cat("Fireplace Qu", ("Gd", "TA", "Fa", "Po", "Ex"), missing=0.49),
+    _cat("Garage Type", ("Attchd", "Detchd", "BuiltIn", "Basment", "2Types", "CarPort"), missing=0.05),
+    _num("Garage Yr Blt", 1895, 2010, missing=0.05, dtype="float"),
+    _cat("Garage Finish", ("Unf", "RFn", "Fin"), missing=0.05),
+    _num("Garage Cars", 0, 5),
+    _num("Garage Area", 0, 1400, zeros=0.05),
+    _cat("Garage Qual", QUALITY, missing=0.05),
+    _cat("Garage Cond", QUALITY, missing=0.05),
+    _cat("Paved Drive", ("Y", "N", "P")),
+    _num("Wood Deck SF", 0, 1000, zeros=0.52),
+    _num("Open Porch SF", 0, 700, zeros=0.44),
+    _num("Enclosed Porch", 0, 1000, zeros=0.84),
+    _num("3Ssn Porch", 0, 500, zeros=0.99),
+    _num("Screen Porch", 0, 600, zeros=0.91),
+    _num("Pool Area", 0, 800, zeros=0.99),
+    _cat("Pool QC", ("Ex", "Gd", "TA", "Fa"), missing=0.99),
+    _cat("Fence", ("MnPrv", "GdPrv", "GdWo", "MnWw"), missing=0.8),
+    _cat("Misc Feature", ("Shed", "Gar2", "Othr", "Elev", "TenC"), missing=0.96),
+    _num("Misc Val", 0, 17000, zeros=0.96),
+    _num("Mo Sold", 1, 12),
+    _num("Yr Sold", 2006, 2010),
+    _cat("Sale Type", ("WD ", "New", "COD", "ConLD", "CWD", "ConLI", "ConLw", "Oth", "Con", "VWD")),
+    _cat("Sale Condition", ("Normal", "Partial", "Abnorml", "Family", "Alloca", "AdjLand")),
+)
+
+
+def make_synthetic_ames(n_rows: int, random_state: int = 42) -> pd.DataFrame:
+    """
+    Synthetic data with the Ames columns, dtypes, category levels and
+    missing rates. SalePrice is a noisy function of size, quality, age and
+    garage so models have something to learn.
+
+    Args:
+        n_rows (int): Number of rows.
+        random_state (int): Seed.
+
+    Returns:
+        pd.DataFrame: Data in the layout of data/raw/AmesHousing.csv.
+    """
+    try:
+        rng = np.random.default_rng(random_state)
+        data = {
+            "Order": np.arange(1, n_rows + 1),
+            "PID": rng.integers(526_000_000, 1_000_000_000, n_rows),
+        }
+
+        for spec in AMES_SCHEMA:
+            if "levels" in spec:
+                # geometric level frequencies: one dominant level, a long tail
+                weights = 0.6 ** np.arange(len(spec["levels"]))
+                values = rng.choice(np.array(spec["levels"], dtype=object), n_rows, p=weights / weights.sum())
+            else:
+                values = rng.integers(spec["low"], spec["high"] + 1, n_rows)
+                if spec["zeros"]:
+                    values[rng.random(n_rows) < spec["zeros"]] = 0
+                if spec["dtype"] == "float":
+                    values = values.astype(np.float64)
+
+            if spec["missing"]:
+                values = values.astype(object if "levels" in spec else np.float64)
+                values[rng.random(n_rows) < spec["missing"]] = np.nan
+            data[spec["name"]] = values
+
+        price = (
+            20_000
+            + 60 * data["Gr Liv Area"]
+            + 12_000 * data["Overall Qual"]
+            + 25 * data["Total Bsmt SF"]
+            + 7_000 * data["Garage Cars"]
+            + 350 * (data["Year Built"] - 1872)
+            + rng.normal(0, 15_000, n_rows)
+        )
+        data["SalePrice"] = np.maximum(price, 12_789).round().astype(np.int64)
+
+        return pd.DataFrame(data)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def _latency(samples: list) -> dict:
+    samples = np.asarray(samples) * 1e3
+    return {
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "mean_ms": float(samples.mean()),
+    }
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    # ru_maxrss is in KB on Linux, in bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _api_records(n: int) -> list:
+    """
+    /predict-shaped records (the HouseInput fields) from the synthetic test split
+    """
+    from app.schema import HouseInput
+    from src.data_ingestion import DataIngestionConfig
+    from src.utils.columnar import read_table
+
+    fields = [f.alias or name for name, f in HouseInput.model_fields.items()]
+    test = read_table(DataIngestionConfig().test_data_path, columns=fields)
+    records = test.head(n).astype(object).where(test.head(n).notna(), None).to_dict("records")
+    return [records[i % len(records)] for i in range(n)]
+
+
+def bench_training(data_path: str) -> dict:
+    """
+    Runs TrainingPipeline once and reports the wall time of every phase
+    """
+    from pipeline.train_pipeline import TrainingPipeline
+
+    report = TrainingPipeline().run_pipeline(data_path=data_path)
+    report["peak_rss_mb"] = _peak_rss_mb()
+    # model candidates train in a process pool
+    report["children_peak_rss_mb"] = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+    return report
+
+
+def bench_inference(batch_sizes: list, repeats: int) -> dict:
+    """
+    Artifact load, InputAdapter.adapt, single-row predict_results and
+    predict_batch at each batch size, against the artifacts in the workspace
+    """
+    from pipeline.prediction_pipeline import PredictionPipeline
+
+    start = time.perf_counter()
+    predictor = PredictionPipeline()
+    predictor.load_pipeline()
+    result = {
+        "load_seconds": time.perf_counter() - start,
+        "artifact_load_seconds": predictor.load_seconds,
+        "compiled": predictor.compiled is not None,
+    }
+
+    records = _api_records(max(batch_sizes + [repeats]))
+    record = records[0]
+
+    samples = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        predictor.adapter.adapt(records[i])
+        samples.append(time.perf_counter() - start)
+    result["adapt"] = _latency(samples)
+
+    # warm up, then time one request at a time
+    predictor.predict_results(record)
+    samples = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        predictor.predict_results(records[i])
+        samples.append(time.perf_counter() - start)
+    result["predict_single"] = _latency(samples)
+
+    result["predict_batch"] = {}
+    for size in batch_sizes:
+        batch = records[:size]
+        # at least 3 runs and about a second of work per size
+        samples, deadline = [], time.perf_counter() + 1.0
+        while len(samples) < 3 or time.perf_counter() < deadline:
+            start = time.perf_counter()
+            predictor.predict_batch(batch)
+            samples.append(time.perf_counter() - start)
+        stats = _latency(samples)
+        stats["rows_per_second"] = size / np.median(samples)
+        result["predict_batch"][str(size)] = stats
+
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run_worker(task: str, workspace: str, args) -> dict:
+    """
+    Runs one benchmark task in a child process inside the workspace: the
+    relative artifact paths and HOUSE_PRICE_BASE_DIR both resolve there
+    """
+    output = os.path.join(workspace, f"benchmark_{task}.json")
+    command = [
+        sys.executable, "-m", "pipeline.benchmark", "--worker", task, "--worker-output", output,
+        "--batch-sizes", *map(str, args.batch_sizes), "--repeats", str(args.repeats),
+    ]
+    env = dict(os.environ, HOUSE_PRICE_BASE_DIR=workspace)
+    # keeps convergence warnings from the candidate models out of the report output
+    env.setdefault("PYTHONWARNINGS", "ignore")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+
+    start = time.perf_counter()
+    subprocess.run(command, cwd=workspace, env=env, check=True)
+    logger.info(f"Benchmark [{task}] finished in {time.perf_counter() - start:.1f}s")
+    with open(output) as f:
+        return json.load(f)
+
+
+def run_benchmarks(args) -> dict:
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": {"numpy": np.__version__, "pandas": pd.__version__},
+        "scales": {},
+    }
+    try:
+        import sklearn
+        results["versions"]["scikit-learn"] = sklearn.__version__
+    except ImportError:
+        pass
+
+    for scale in args.scales:
+        workspace = tempfile.mkdtemp(prefix=f"house_price_bench_{scale}x_", dir=args.workdir)
+        try:
+            n_rows = AMES_ROWS * scale
+            data_path = os.path.join(workspace, "data", "raw", "AmesHousing.csv")
+            os.makedirs(os.path.dirname(data_path))
+
+            start = time.perf_counter()
+            make_synthetic_ames(n_rows, args.seed).to_csv(data_path, index=False)
+            print(f"[{scale}x] {n_rows} synthetic rows in {time.perf_counter() - start:.1f}s", flush=True)
+
+            results["scales"][str(scale)] = {
+                "rows": n_rows,
+                "training": _run_worker("training", workspace, args),
+                "inference": _run_worker("inference", workspace, args),
+            }
+            print(json.dumps({str(scale): results["scales"][str(scale)]}, indent=2), flush=True)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workspace, ignore_errors=True)
+
+    return results
+
+
+def _flatten(tree: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in tree.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(previous: dict, current: dict) -> list:
+    """
+    Current / previous ratio of every timing and memory figure present in both
+    runs; above 1 is slower or larger, except for rows_per_second.
+
+    Returns:
+        list: (metric, previous, current, ratio) tuples.
+    """
+    before = _flatten(previous.get("scales", {}))
+    after = _flatten(current.get("scales", {}))
+    rows = []
+    for metric in sorted(before.keys() & after.keys()):
+        if metric.endswith(".rows") or not before[metric]:
+            continue
+        rows.append((metric, before[metric], after[metric], after[metric] / before[metric]))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10],
+                        help="dataset sizes as multiples of the 2930 Ames rows")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=200, help="timed single-row requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON report path (default artifacts/reports/benchmarks/<time>_<commit>.json)")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    parser.add_argument("--workdir", help="parent directory of the scratch workspaces")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch workspaces")
+    parser.add_argument("--worker", choices=["training", "inference"], help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker == "training":
+        result = bench_training(os.path.join("data", "raw", "AmesHousing.csv"))
+    elif args.worker == "inference":
+        result = bench_inference(args.batch_sizes, args.repeats)
+    else:
+        result = run_benchmarks(args)
+
+    output = args.worker_output or args.output or os.path.join(
+        REPO_ROOT, "artifacts", "reports", "benchmarks",
+        f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{result['commit'] or 'nocommit'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    if args.worker:
+        return
+    print(f"Benchmark report saved at {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        print(f"\nvs {args.compare} (commit {previous.get('commit')})")
+        for metric, before, after, ratio in compare(previous, result):
+            print(f"{metric:60s} {before:12.4g} -> {after:12.4g}  x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
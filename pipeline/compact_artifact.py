@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+from datetime import datetime, timezone
+from typing import Optional
+import numpy as np
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+from src.utils.common import get_model_metrics
+from pipeline.compiled_forest import CompiledForest, is_compilable_forest
+from pipeline.compiled_predictor import CompiledPredictor
+
+logger = get_logger(__name__)
+
+FORMAT_NAME = "house-price-compact"
+FORMAT_VERSION = 1
+PRECISIONS = ("float64", "float32", "uint16")
+
+
+def _round_down_float32(values: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 at or below each float64 value. Trees compare float32
+    inputs with x <= threshold, so this keeps every split decision unchanged.
+    """
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _index_dtype(max_value: int):
+    return np.int16 if max_value < 2 ** 15 else np.int32 if max_value < 2 ** 31 else np.int64
+
+
+def _pack_forest(forest: CompiledForest, precision: str) -> tuple:
+    """
+    Returns:
+        tuple: (forest manifest entry, dict of packed arrays).
+    """
+    leaf = forest.left == np.arange(len(forest.left))
+    # only leaf values are ever read; zeros compress better
+    value = np.where(leaf, forest.value, 0.0)
+
+    info = {
+        "n_trees": forest.n_trees,
+        "n_nodes": len(value),
+        "n_features": forest.n_features,
+        "depth": forest.depth,
+        "precision": precision,
+    }
+    if precision == "uint16":
+        # 16-bit linear quantization of the leaf values over their range
+        low, high = value[leaf].min(), value[leaf].max()
+        scale = (high - low) / 65535 if high > low else 1.0
+        value = np.where(leaf, np.round((value - low) / scale), 0).astype(np.uint16)
+        info.update({"value_offset": float(low), "value_scale": float(scale)})
+    else:
+        value = value.astype(precision)
+
+    index = _index_dtype(len(forest.left))
+    arrays = {
+        "feature": forest.feature.astype(_index_dtype(forest.n_features)),
+        "threshold": _round_down_float32(forest.threshold),
+        "left": forest.left.astype(index),
+        "right": forest.right.astype(index),
+        "missing_left": forest.missing_left.astype(bool),
+        "value": value,
+        "roots": forest.roots.astype(index),
+    }
+    return info, arrays
+
+
+def _unpack_forest(info: dict, arrays: dict, max_batch_rows: int) -> CompiledForest:
+    value = arrays["value"].astype(np.float64)
+    if info["precision"] == "uint16":
+        value = value * info["value_scale"] + info["value_offset"]
+    return CompiledForest.from_arrays(
+        {
+            "feature": arrays["feature"].astype(np.intp),
+            # kept as float32: exact for the float32 inputs, half the memory
+            "threshold": arrays["threshold"],
+            "left": arrays["left"].astype(np.intp),
+            "right": arrays["right"].astype(np.intp),
+            "missing_left": arrays["missing_left"],
+            "value": value,
+            "roots": arrays["roots"].astype(np.intp),
+        },
+        n_features=info["n_features"],
+        depth=info["depth"],
+        max_batch_rows=max_batch_rows
+    )
+
+
+def export_compact(pipeline, defaults: dict, path: str, conditional=None,
+                   precision: str = "float32", metadata: Optional[dict] = None) -> dict:
+    """
+    Writes a fitted full_pipeline as a compact artifact: the compiled
+    predictor's parameters as compressed NumPy arrays plus a JSON manifest
+    describing them, in one .npz file that loads without unpickling.
+
+    Args:
+        pipeline (Pipeline): Fitted full_pipeline with a linear or forest model.
+        defaults (dict): Input defaults for missing request fields.
+        path (str): Destination .npz file, replaced atomically.
+        conditional (ConditionalDefaults): Optional per-group defaults.
+        precision (str): Forest leaf values as "float64", "float32" or "uint16".
+        metadata (dict): Extra JSON values stored in the manifest.
+
+    Returns:
+        dict: The manifest.
+    """
+    try:
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+
+        model = pipeline.steps[-1][1]
+        forest = CompiledForest(model) if is_compilable_forest(model) else None
+        predictor = CompiledPredictor(pipeline, defaults, conditional, forest=forest)
+        spec, state = predictor.export_state()
+
+        arrays = {f"predictor.{name}": np.asarray(a) for name, a in state.items()}
+        manifest = {
+            "format": FORMAT_NAME,
+            "format_version": FORMAT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "model": {"class": type(model).__name__, "type": "linear" if forest is None else "forest"},
+            "predictor": spec,
+            "metadata": metadata or {},
+        }
+        if forest is not None:
+            info, packed = _pack_forest(forest, precision)
+            manifest["model"]["forest"] = info
+            arrays.update({f"forest.{name}": a for name, a in packed.items()})
+
+        # the schema: every array's dtype and shape, checked on load
+        manifest["arrays"] = {name: {"dtype": a.dtype.str, "shape": list(a.shape)} for name, a in arrays.items()}
+        arrays["manifest"] = np.frombuffer(json.dumps(manifest).encode("utf-8"), dtype=np.uint8)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+        logger.info(f"Compact artifact ({precision}) saved at {path}: {os.path.getsize(path)} bytes")
+        return manifest
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_manifest(path: str) -> dict:
+    """
+    Args:
+        path (str): Compact artifact written by export_compact.
+
+    Returns:
+        dict: Its manifest, without loading the other arrays.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return json.loads(data["manifest"].tobytes())
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_compact(path: str, max_batch_rows: int = 128) -> tuple:
+    """
+    Loads a compact artifact with allow_pickle=False, so no code is
+    executed from the file.
+
+    Returns:
+        tuple: (CompiledPredictor, manifest).
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            manifest = json.loads(data["manifest"].tobytes())
+            if manifest.get("format") != FORMAT_NAME or manifest.get("format_version") != FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported artifact format {manifest.get('format')} v{manifest.get('format_version')}"
+                )
+
+            arrays = {}
+            for name, schema in manifest["arrays"].items():
+                array = data[name]
+                if array.dtype.str != schema["dtype"] or list(array.shape) != schema["shape"]:
+                    raise ValueError(f"Array {name} does not match the manifest")
+                arrays[name] = array
+
+        state = {name.split(".", 1)[1]: a for name, a in arrays.items() if name.startswith("predictor.")}
+        forest = None
+        if manifest["model"]["type"] == "forest":
+            packed = {name.split(".", 1)[1]: a for name, a in arrays.items() if name.startswith("forest.")}
+            forest = _unpack_forest(manifest["model"]["forest"], packed, max_batch_rows)
+
+        predictor = CompiledPredictor.from_state(manifest["predictor"], state, forest=forest)
+        logger.info(f"Compact artifact loaded from {path} ({manifest['model']['class']})")
+        return predictor, manifest
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def accuracy_deltas(y_true, reference, compact) -> dict:
+    """
+    Args:
+        y_true (np.ndarray): True target values.
+        reference (np.ndarray): Predictions of the full-precision pipeline.
+        compact (np.ndarray): Predictions of the compact artifact.
+
+    Returns:
+        dict: R2 and RMSE of both, their differences and the prediction differences.
+    """
+    reference_metrics = get_model_metrics(y_true, reference)
+    compact_metrics = get_model_metrics(y_true, compact)
+    difference = np.abs(np.asarray(compact, dtype=np.float64) - np.asarray(reference, dtype=np.float64))
+    return {
+        "reference_test_r2": float(reference_metrics["r2_score"]),
+        "compact_test_r2": float(compact_metrics["r2_score"]),
+        "test_r2_delta": float(compact_metrics["r2_score"] - reference_metrics["r2_score"]),
+        "reference_test_rmse": float(reference_metrics["rmse"]),
+        "compact_test_rmse": float(compact_metrics["rmse"]),
+        "test_rmse_delta": float(compact_metrics["rmse"] - reference_metrics["rmse"]),
+        "max_abs_prediction_delta": float(difference.max()),
+        "mean_abs_prediction_delta": float(difference.mean()),
+    }
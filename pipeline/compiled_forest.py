@@ -0,0 +1,183 @@
+import sys
+import numpy as np
+from scipy import sparse
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+
+logger = get_logger(__name__)
+
+FOREST_MODELS = (RandomForestRegressor, ExtraTreesRegressor)
+
+
+def is_compilable_forest(model) -> bool:
+    return isinstance(model, FOREST_MODELS) and getattr(model, "n_outputs_", 1) == 1
+
+
+class CompiledForest:
+    """
+    A fitted regression forest flattened into packed node arrays, scored by
+    walking all (row, tree) pairs one level at a time with NumPy gathers.
+
+    Every tree's nodes are concatenated into one set of contiguous arrays
+    (feature, threshold, left / right child, NaN direction, leaf value) with
+    child indices made global, and leaves point to themselves so rows that
+    reached a leaf stay put while the others descend. A predict is then
+    max_depth rounds of a handful of array operations over (rows x trees),
+    instead of one Python-level tree.predict call per tree.
+
+    The result is bit for bit that of forest.predict with n_jobs=None: X
+    is cast to float32 like sklearn's trees do, and the tree outputs are
+    summed sequentially in estimator order before dividing by their count.
+    Above max_batch_rows the rows x trees state gets large, and the batch
+    is handed to sklearn's compiled traversal instead.
+    """
+
+    def __init__(self, model, max_batch_rows: int = 128):
+        try:
+            if not is_compilable_forest(model):
+                raise ValueError(f"Cannot compile {type(model).__name__} as a forest")
+
+            self.model = model
+            self.max_batch_rows = max_batch_rows
+            self.n_features = model.n_features_in_
+
+            features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+            offset = 0
+            depth = 0
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                n = tree.node_count
+                ids = np.arange(n)
+                leaf = tree.children_left == -1
+
+                features.append(np.where(leaf, 0, tree.feature))
+                # x <= inf and the NaN flag both keep a row at its leaf
+                thresholds.append(np.where(leaf, np.inf, tree.threshold))
+                lefts.append(np.where(leaf, ids, tree.children_left) + offset)
+                rights.append(np.where(leaf, ids, tree.children_right) + offset)
+                missing.append(np.where(leaf, True, tree.missing_go_to_left.astype(bool)))
+                values.append(tree.value[:, 0, 0])
+                roots.append(offset)
+
+                offset += n
+                depth = max(depth, tree.max_depth)
+
+            self.feature = np.concatenate(features).astype(np.intp)
+            self.threshold = np.concatenate(thresholds).astype(np.float64)
+            self.left = np.concatenate(lefts).astype(np.intp)
+            self.right = np.concatenate(rights).astype(np.intp)
+            self.missing_left = np.concatenate(missing)
+            self.value = np.concatenate(values).astype(np.float64)
+            self.roots = np.array(roots, dtype=np.intp)
+            self.depth = depth
+
+            logger.info(
+                f"Forest compiled: {len(self.roots)} trees, {offset} nodes, depth {depth}"
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    # packed node arrays, as exported to and loaded from compact artifacts
+    ARRAYS = ("feature", "threshold", "left", "right", "missing_left", "value", "roots")
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, n_features: int, depth: int,
+                    max_batch_rows: int = 128) -> "CompiledForest":
+        """
+        A forest from its packed node arrays alone, without the sklearn
+        model: every batch is scored by the node arrays, in chunks of
+        max_batch_rows rows
+        """
+        forest = cls.__new__(cls)
+        forest.model = None
+        forest.max_batch_rows = max_batch_rows
+        forest.n_features = n_features
+        forest.depth = depth
+        for name in cls.ARRAYS:
+            setattr(forest, name, arrays[name])
+        return forest
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Global leaf index of every (row, tree), shape (n_rows, n_trees)
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows = X.shape[0]
+
+        # flat positions of each row's first feature, added to the node's feature
+        row_start = (np.arange(n_rows, dtype=np.intp) * self.n_features)[:, None]
+        flat = X.ravel()
+        has_missing = np.isnan(flat).any()
+
+        node = np.repeat(self.roots[None, :], n_rows, axis=0)
+        for _ in range(self.depth):
+            x = flat.take(row_start + self.feature.take(node))
+            go_left = x <= self.threshold.take(node)
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left.take(node)
+            node = np.where(go_left, self.left.take(node), self.right.take(node))
+        return node
+
+    def _predict(self, X) -> np.ndarray:
+        leaf_values = self.value.take(self.apply(X))
+        # cumsum adds in estimator order, like the forest's accumulation
+        return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_trees
+
+    def predict(self, X) -> np.ndarray:
+        try:
+            if sparse.issparse(X):
+                X = X.toarray()
+            if X.shape[0] > self.max_batch_rows:
+                if self.model is not None:
+                    return self.model.predict(X)
+                return np.concatenate([
+                    self._predict(X[start:start + self.max_batch_rows])
+                    for start in range(0, X.shape[0], self.max_batch_rows)
+                ])
+            return self._predict(X)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def validate(self, n_rows: int = 64, random_state: int = 0) -> bool:
+        """
+        Checks predict against the forest on probe rows built from its own
+        split thresholds (on, just below and just above them) plus missing
+        values, so both branches of many splits are exercised.
+
+        Returns:
+            bool: True if every prediction is identical to forest.predict.
+        """
+        rng = np.random.default_rng(random_state)
+        X = np.zeros((n_rows, self.n_features), dtype=np.float32)
+        split = self.threshold < np.inf
+        for j in range(self.n_features):
+            thresholds = self.threshold[split & (self.feature == j)].astype(np.float32)
+            if len(thresholds):
+                X[:, j] = rng.choice(thresholds, n_rows)
+        nudge = rng.integers(-1, 2, size=X.shape)
+        X = np.where(nudge < 0, np.nextafter(X, -np.inf), np.where(nudge > 0, np.nextafter(X, np.inf), X))
+        X[rng.random(X.shape) < 0.05] = np.nan
+        X = X.astype(np.float64)
+
+        # the reference is the sequential sum: with n_jobs > 1 the forest adds
+        # the trees in whatever order its threads finish
+        n_jobs = self.model.n_jobs
+        self.model.n_jobs = None
+        try:
+            try:
+                expected = self.model.predict(X)
+            except ValueError:
+                # forests fitted without missing values reject NaN at predict
+                X = np.nan_to_num(X)
+                expected = self.model.predict(X)
+        finally:
+            self.model.n_jobs = n_jobs
+        return bool(np.array_equal(self.predict(X), expected))
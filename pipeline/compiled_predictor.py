@@ -0,0 +1,514 @@
+import sys
+import numpy as np
+import pandas as pd
+
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression, Ridge, Lasso
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+from src.feature_engineering import FeatureEngineering, DerivedFeature
+from src.outlier_handling import OutlierHandler
+from src.fused_preprocessing import FusedPreprocessor
+from src.utils.input_defaults import ConditionalDefaults
+from pipeline.compiled_forest import CompiledForest
+from src.utils.metrics import STAGE_SECONDS
+
+logger = get_logger(__name__)
+
+ENCODE_SECONDS = STAGE_SECONDS.labels("compiled_encode")
+SCORE_SECONDS = STAGE_SECONDS.labels("compiled_model")
+
+LINEAR_MODELS = (LinearRegression, Ridge, Lasso)
+
+# compiled state that export_state() writes and from_state() restores
+STATE_FIELDS = (
+    "ordinal_offset", "numeric_offset", "encoded_width", "numeric_features", "categorical_features",
+    "feature_names", "numeric_cols", "derived_pos", "raw_pos", "onehot_spans", "intercept",
+)
+STATE_ARRAYS = (
+    "ordinal_unknown", "direct_pos", "direct_src", "low", "high", "gather", "fill", "mean", "scale",
+    "default_numeric", "default_encoded",
+)
+
+
+def _is_passthrough(transformer) -> bool:
+    return transformer == "passthrough" or (
+        isinstance(transformer, FunctionTransformer) and transformer.func is None
+    )
+
+
+def _column_positions(column_transformer: ColumnTransformer, columns) -> np.ndarray:
+    """
+    Resolves a ColumnTransformer column selection (names, positions or mask)
+    to integer positions of its input
+    """
+    columns = list(columns)
+    if not columns:
+        return np.array([], dtype=np.intp)
+    if isinstance(columns[0], str):
+        names = list(column_transformer.feature_names_in_)
+        return np.array([names.index(c) for c in columns], dtype=np.intp)
+    if isinstance(columns[0], (bool, np.bool_)):
+        return np.flatnonzero(columns)
+    return np.array(columns, dtype=np.intp)
+
+
+def _column_plan(column_transformer: ColumnTransformer):
+    """
+    Lists (name, transformer, input positions) in the order the
+    ColumnTransformer stacks its outputs
+    """
+    plan = []
+    for name, transformer, columns in column_transformer.transformers_:
+        if transformer == "drop":
+            continue
+        positions = _column_positions(column_transformer, columns)
+        if len(positions):
+            plan.append((name, transformer, positions))
+    return plan
+
+
+def _category_key(value):
+    # every NaN is the same dict key
+    return np.nan if isinstance(value, float) and value != value else value
+
+
+def _json_key(value):
+    # category keys as JSON values; NaN becomes null
+    value = _category_key(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    return None if isinstance(value, float) and value != value else value
+
+
+def _from_json_key(value):
+    return np.nan if value is None else value
+
+
+def _unwrap(transformer, expected_type):
+    if isinstance(transformer, Pipeline):
+        if len(transformer.steps) != 1:
+            raise ValueError(f"Cannot compile multi-step pipeline {transformer}")
+        transformer = transformer.steps[0][1]
+    if not isinstance(transformer, expected_type):
+        raise ValueError(f"Cannot compile {type(transformer).__name__}")
+    return transformer
+
+
+class CompiledPredictor:
+    """
+    Flattens a fitted full_pipeline into NumPy arrays and scores rows
+    with plain array operations instead of pandas / ColumnTransformer dispatch.
+    """
+
+    def __init__(self, pipeline: Pipeline, defaults: dict, conditional=None, forest: CompiledForest = None):
+        try:
+            logger.info("Compiling prediction pipeline")
+            steps = pipeline.named_steps
+
+            if not isinstance(steps["feature_engineering"], FeatureEngineering):
+                raise ValueError("Unexpected feature engineering step")
+            if not isinstance(steps["outlier_handler"], OutlierHandler):
+                raise ValueError("Unexpected outlier handling step")
+
+            # derived features come from the fitted step's FEATURE_SPEC
+            features, _ = steps["feature_engineering"].resolved_spec()
+            self.derived_features = {feature.name: feature for feature in features}
+
+            if isinstance(steps.get("preprocessing"), FusedPreprocessor):
+                self._compile_fused(steps["preprocessing"], steps["outlier_handler"])
+            else:
+                # pipelines trained before the fused step
+                self._compile_encoding(steps["encoding"], steps["outlier_handler"])
+                self._compile_imputation_and_scaling(steps["imputation"], steps["scaling"])
+            self._compile_model(steps["model"], forest)
+            self._compile_defaults(defaults, conditional)
+
+            logger.info(
+                f"Pipeline compiled: {len(self.feature_names)} input features, "
+                f"{len(self.fill)} model features"
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _compile_encoding(self, encoding: ColumnTransformer, outlier: OutlierHandler):
+        ordinal, nominal, numeric_cols = [], [], []
+
+        for name, transformer, positions in _column_plan(encoding):
+            columns = list(encoding.feature_names_in_[positions])
+            if isinstance(transformer, OrdinalEncoder):
+                ordinal += zip(columns, transformer.categories_)
+            elif isinstance(transformer, OneHotEncoder):
+                nominal += zip(columns, transformer.categories_)
+            elif _is_passthrough(transformer):
+                numeric_cols += columns
+            else:
+                raise ValueError(f"Cannot compile encoder {type(transformer).__name__}")
+
+        self._compile_layout(ordinal, nominal, numeric_cols, outlier)
+
+    def _compile_fused(self, preprocessor: FusedPreprocessor, outlier: OutlierHandler):
+        ordinal = list(zip(preprocessor.ordinal_features_, preprocessor.ordinal_categories_))
+        nominal = list(zip(preprocessor.nominal_features_, preprocessor.nominal_categories_))
+        if preprocessor.native_:
+            # nominal columns are category codes too, missing (NaN) when unknown
+            self._compile_layout(ordinal + nominal, [], list(preprocessor.numeric_features_), outlier)
+            self.ordinal_unknown[len(ordinal):] = np.nan
+        else:
+            self._compile_layout(ordinal, nominal, list(preprocessor.numeric_features_), outlier)
+
+        # encoded columns are never missing; numeric columns without a median were dropped
+        n_encoded = self.numeric_offset
+        kept = [self.numeric_cols.index(c) for c in preprocessor.numeric_kept_]
+        self.gather = np.concatenate([
+            np.arange(n_encoded), self.numeric_offset + np.array(kept, dtype=np.intp)
+        ])
+        self.fill = np.concatenate([np.full(n_encoded, np.nan), preprocessor.statistics_])
+        self.mean = np.asarray(preprocessor.mean_, dtype=np.float64)
+        self.scale = np.asarray(preprocessor.scale_, dtype=np.float64)
+
+    def _compile_layout(self, ordinal: list, nominal: list, numeric_cols: list, outlier: OutlierHandler):
+        """
+        Encoded matrix layout [ordinal codes | one-hot flags | numeric block]
+        from (column, categories) pairs and the passthrough numeric columns
+        """
+        # unknown and missing categories both encode to -1
+        ordinal_cols = [column for column, _ in ordinal]
+        self.ordinal_maps = [
+            {_category_key(value): float(code) for code, value in enumerate(categories)}
+            for _, categories in ordinal
+        ]
+        self.ordinal_unknown = np.full(len(ordinal), -1.0)
+        self.ordinal_offset = 0
+        width = len(ordinal_cols)
+
+        # missing values map to the NaN category, None and unknown to all zeros
+        nominal_cols = [column for column, _ in nominal]
+        self.onehot_maps, self.onehot_spans = [], []
+        for _, categories in nominal:
+            vocab = {}
+            for code, value in enumerate(categories):
+                vocab[_category_key(value)] = width + code
+            self.onehot_maps.append(vocab)
+            self.onehot_spans.append((width, width + len(categories)))
+            width += len(categories)
+
+        self.numeric_offset = width
+        width += len(numeric_cols)
+
+        self.encoded_width = width
+
+        # raw numeric inputs: passthrough columns plus the sources FeatureEngineering drops
+        raw_numeric = [c for c in numeric_cols if c not in self.derived_features]
+        for feature in self.derived_features.values():
+            raw_numeric += [c for c in feature.sources if c not in raw_numeric]
+
+        self.numeric_features = raw_numeric
+        self.categorical_features = ordinal_cols + nominal_cols
+        self.feature_names = self.numeric_features + self.categorical_features
+
+        # numeric block layout after feature engineering
+        self.numeric_cols = numeric_cols
+        self.direct_pos = np.array(
+            [i for i, c in enumerate(numeric_cols) if c in raw_numeric], dtype=np.intp
+        )
+        self.direct_src = np.array(
+            [raw_numeric.index(c) for c in numeric_cols if c in raw_numeric], dtype=np.intp
+        )
+        self.derived_pos = {
+            feature: numeric_cols.index(feature)
+            for feature in self.derived_features if feature in numeric_cols
+        }
+        self.raw_pos = {c: i for i, c in enumerate(raw_numeric)}
+
+        # IQR bounds aligned with the numeric block, no-op bounds where none were learned
+        self.low = np.full(len(numeric_cols), -np.inf)
+        self.high = np.full(len(numeric_cols), np.inf)
+        for i, col in enumerate(numeric_cols):
+            if col in outlier.bounds:
+                low, high = outlier.bounds[col]
+                self.low[i] = -np.inf if pd.isna(low) else low
+                self.high[i] = np.inf if pd.isna(high) else high
+
+    def _compile_imputation_and_scaling(self, imputation: ColumnTransformer, scaling: ColumnTransformer):
+        gather, fill = [], []
+        for name, transformer, positions in _column_plan(imputation):
+            if _is_passthrough(transformer):
+                gather.append(positions)
+                fill.append(np.full(len(positions), np.nan))
+                continue
+            imputer = _unwrap(transformer, SimpleImputer)
+            statistics = np.asarray(imputer.statistics_, dtype=np.float64)
+            keep = np.ones(len(positions), dtype=bool)
+            if not getattr(imputer, "keep_empty_features", False):
+                # SimpleImputer drops columns that were entirely missing during fit
+                keep = ~np.isnan(statistics)
+            gather.append(positions[keep])
+            fill.append(statistics[keep])
+
+        gather = np.concatenate(gather)
+        fill = np.concatenate(fill)
+
+        order, mean, scale = [], [], []
+        for name, transformer, positions in _column_plan(scaling):
+            order.append(positions)
+            if _is_passthrough(transformer):
+                mean.append(np.zeros(len(positions)))
+                scale.append(np.ones(len(positions)))
+                continue
+            scaler = _unwrap(transformer, StandardScaler)
+            mean.append(scaler.mean_ if scaler.mean_ is not None and scaler.with_mean else np.zeros(len(positions)))
+            scale.append(scaler.scale_ if scaler.scale_ is not None and scaler.with_std else np.ones(len(positions)))
+
+        order = np.concatenate(order)
+
+        # one gather from the encoded block straight into model feature order
+        self.gather = gather[order]
+        self.fill = fill[order]
+        self.mean = np.concatenate(mean).astype(np.float64)
+        self.scale = np.concatenate(scale).astype(np.float64)
+
+    def _compile_model(self, model, forest=None):
+        self.model = model
+        # flattened RandomForest (see CompiledForest), scored instead of model.predict
+        self.forest = forest if forest is not None and forest.model is model else None
+        if isinstance(model, LINEAR_MODELS):
+            self.coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+            self.intercept = float(np.ravel(model.intercept_)[0])
+        else:
+            self.coef = None
+            self.intercept = None
+
+    def _compile_defaults(self, defaults: dict, conditional=None):
+        self.default_numeric = np.array(
+            [defaults.get(c, np.nan) for c in self.numeric_features], dtype=np.float64
+        )
+
+        # encoded categorical row for the defaults, patched per request
+        default_categorical = np.empty((1, len(self.categorical_features)), dtype=object)
+        default_categorical[0, :] = [defaults.get(c, np.nan) for c in self.categorical_features]
+        self.default_encoded = np.zeros((1, self.encoded_width))
+        self._encode_categorical(self.default_encoded, default_categorical)
+        self._compile_keys(conditional)
+
+    def _compile_keys(self, conditional=None):
+        # accept both "Gr Liv Area" and "Gr_Liv_Area" style keys
+        self.key_index = {}
+        for i, col in enumerate(self.feature_names):
+            self.key_index[col] = i
+            self.key_index[col.replace(" ", "_")] = i
+
+        # per-group numeric defaults (ConditionalDefaults) for requests giving the group field
+        self.conditional = conditional
+        if conditional is not None:
+            self.group_keys = [k for k, i in self.key_index.items() if self.feature_names[i] == conditional.key]
+            self.group_plan = conditional.plan(self.numeric_features)
+
+    def _derive(self, numeric: np.ndarray, feature: str) -> np.ndarray:
+        """
+        Computes a derived column of FeatureEngineering.transform from the raw numeric block
+        """
+        return self.derived_features[feature].compute(lambda name: numeric[:, self.raw_pos[name]])
+
+    def _write_numeric(self, encoded: np.ndarray, numeric: np.ndarray) -> None:
+        """
+        Feature engineering and outlier capping of the (n, numeric_features)
+        block, written into the passthrough slice of the encoded matrix
+        """
+        block = encoded[:, self.numeric_offset:self.numeric_offset + len(self.numeric_cols)]
+        block[:, self.direct_pos] = numeric[:, self.direct_src]
+        for feature, pos in self.derived_pos.items():
+            block[:, pos] = self._derive(numeric, feature)
+        np.clip(block, self.low, self.high, out=block)
+
+    def _category_position(self, j: int, value):
+        """
+        Encoded position and value of categorical feature j, or (None, None)
+        for unknown one-hot categories
+        """
+        n_ordinal = len(self.ordinal_maps)
+        value = _category_key(value)
+        if j < n_ordinal:
+            return self.ordinal_offset + j, self.ordinal_maps[j].get(value, self.ordinal_unknown[j])
+        position = self.onehot_maps[j - n_ordinal].get(value)
+        return (None, None) if position is None else (position, 1.0)
+
+    def _encode_categorical(self, encoded: np.ndarray, categorical: np.ndarray) -> None:
+        """
+        Writes ordinal codes and one-hot flags for (n, categorical_features) values
+        """
+        for row, values in enumerate(categorical):
+            for j, value in enumerate(values):
+                position, code = self._category_position(j, value)
+                if position is not None:
+                    encoded[row, position] = code
+
+    def _score(self, encoded: np.ndarray) -> np.ndarray:
+        """
+        Imputation, scaling and the model on the encoded matrix
+        """
+        X = encoded[:, self.gather]
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.fill, X)
+        X -= self.mean
+        X /= self.scale
+
+        if self.coef is not None:
+            return X @ self.coef + self.intercept
+        if self.forest is not None:
+            return self.forest.predict(X)
+        return self.model.predict(X)
+
+    def _encode_records(self, records: list) -> np.ndarray:
+        """
+        Broadcasts the encoded defaults over one row per record and patches in the provided fields
+        """
+        n_numeric = len(self.numeric_features)
+        numeric = np.tile(self.default_numeric, (len(records), 1))
+        if self.conditional is not None:
+            group_values = [
+                next((record[k] for k in self.group_keys if k in record), None) for record in records
+            ]
+            self.conditional.fill(numeric, self.group_plan, group_values)
+        encoded = np.tile(self.default_encoded, (len(records), 1))
+
+        for row, record in enumerate(records):
+            for key, value in record.items():
+                i = self.key_index.get(key)
+                if i is None:
+                    continue
+                if i < n_numeric:
+                    numeric[row, i] = np.nan if value is None else value
+                    continue
+                j = i - n_numeric
+                if j >= len(self.ordinal_maps):
+                    start, end = self.onehot_spans[j - len(self.ordinal_maps)]
+                    encoded[row, start:end] = 0.0
+                position, code = self._category_position(j, value)
+                if position is not None:
+                    encoded[row, position] = code
+
+        self._write_numeric(encoded, numeric)
+        return encoded
+
+    def predict(self, user_input: dict) -> float:
+        """
+        Scores one record; missing fields take the training defaults
+        """
+        try:
+            with ENCODE_SECONDS.time():
+                encoded = self._encode_records([user_input])
+            with SCORE_SECONDS.time():
+                return float(self._score(encoded)[0])
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict_batch(self, records: list) -> np.ndarray:
+        """
+        Scores many records at once, in input order
+        """
+        try:
+            with ENCODE_SECONDS.time():
+                encoded = self._encode_records(records)
+            with SCORE_SECONDS.time():
+                return self._score(encoded)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict_array(self, X) -> np.ndarray:
+        """
+        Scores a 2-D array whose columns follow self.feature_names
+        """
+        try:
+            X = np.asarray(X, dtype=object)
+            n_numeric = len(self.numeric_features)
+
+            encoded = np.zeros((X.shape[0], self.encoded_width))
+            self._encode_categorical(encoded, X[:, n_numeric:])
+            self._write_numeric(encoded, X[:, :n_numeric].astype(np.float64))
+            return self._score(encoded)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def export_state(self) -> tuple:
+        """
+        The compiled state as plain values and NumPy arrays, without the
+        fitted sklearn objects (see pipeline/compact_artifact.py).
+
+        Returns:
+            tuple: (JSON-serializable dict, dict of arrays).
+        """
+        if self.coef is None and self.forest is None:
+            raise ValueError(f"Cannot export {type(self.model).__name__}: only linear models and forests are supported")
+
+        spec = {name: getattr(self, name) for name in STATE_FIELDS}
+        spec["derived_features"] = [
+            {"name": f.name, "sources": list(f.sources), "weights": list(f.weights), "kind": f.kind}
+            for f in self.derived_features.values()
+        ]
+        spec["ordinal_maps"] = [[[_json_key(k), v] for k, v in m.items()] for m in self.ordinal_maps]
+        spec["onehot_maps"] = [[[_json_key(k), v] for k, v in m.items()] for m in self.onehot_maps]
+
+        arrays = {name: getattr(self, name) for name in STATE_ARRAYS}
+        if self.coef is not None:
+            arrays["coef"] = self.coef
+
+        spec["conditional"] = None
+        if self.conditional is not None:
+            spec["conditional"] = {
+                "key": self.conditional.key,
+                "groups": [_json_key(g) for g in self.conditional.groups],
+                "columns": self.conditional.columns,
+            }
+            arrays["conditional_values"] = self.conditional.values
+        return spec, arrays
+
+    @classmethod
+    def from_state(cls, spec: dict, arrays: dict, forest: CompiledForest = None) -> "CompiledPredictor":
+        """
+        Rebuilds a predictor from export_state() output; a forest model is
+        passed in as its CompiledForest
+        """
+        try:
+            predictor = cls.__new__(cls)
+            for name in STATE_FIELDS:
+                setattr(predictor, name, spec[name])
+            predictor.onehot_spans = [tuple(span) for span in spec["onehot_spans"]]
+            for name in STATE_ARRAYS:
+                setattr(predictor, name, arrays[name])
+
+            predictor.derived_features = {
+                f["name"]: DerivedFeature(f["name"], tuple(f["sources"]), tuple(f["weights"]), f["kind"])
+                for f in spec["derived_features"]
+            }
+            predictor.ordinal_maps = [{_from_json_key(k): v for k, v in m} for m in spec["ordinal_maps"]]
+            predictor.onehot_maps = [{_from_json_key(k): v for k, v in m} for m in spec["onehot_maps"]]
+
+            predictor.model = None
+            predictor.coef = arrays.get("coef")
+            predictor.forest = forest
+            if predictor.coef is None and forest is None:
+                raise ValueError("Compiled state has neither coefficients nor a forest")
+
+            conditional = None
+            if spec["conditional"] is not None:
+                conditional = ConditionalDefaults(
+                    spec["conditional"]["key"],
+                    [_from_json_key(g) for g in spec["conditional"]["groups"]],
+                    spec["conditional"]["columns"],
+                    arrays["conditional_values"]
+                )
+            predictor._compile_keys(conditional)
+            return predictor
+
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -1,15 +1,147 @@
+import os
+import numpy as np
 import pandas as pd
 import joblib
 
+# marks a field absent from a record
+_MISSING = object()
+
 class InputAdapter:
-    def __init__(self, defaults_path):
+    def __init__(self, defaults_path, conditional_path=None):
         self.defaults = joblib.load(defaults_path)
+        self.columns = list(self.defaults)
 
-    def adapt(self, user_input: dict) -> pd.DataFrame:
+        # "Gr Liv Area" and "Gr_Liv_Area" style keys, resolved once
+        self.aliases = {}
+        for col in self.columns:
+            self.aliases[col.replace(" ", "_")] = col
+            self.aliases[col] = col
+
+        # each column's slot in the numeric (float64) or object default row
+        is_numeric = {c: pd.api.types.is_number(v) for c, v in self.defaults.items()}
+        self.numeric_cols = [c for c in self.columns if is_numeric[c]]
+        self.object_cols = [c for c in self.columns if not is_numeric[c]]
+        self.numeric_row = np.array([self.defaults[c] for c in self.numeric_cols], dtype=np.float64)
+        self.object_row = np.empty(len(self.object_cols), dtype=object)
+        self.object_row[:] = [self.defaults[c] for c in self.object_cols]
+
+        numeric_slot = {c: j for j, c in enumerate(self.numeric_cols)}
+        object_slot = {c: j for j, c in enumerate(self.object_cols)}
+        self.slots = {
+            c: (True, numeric_slot[c]) if c in numeric_slot else (False, object_slot[c])
+            for c in self.columns
+        }
+        self.positions = {c: i for i, c in enumerate(self.columns)}
+
+        # one-row frame with fixed dtypes, copied and patched per request
+        self.template = self._frame(self.numeric_row[None, :], self.object_row[None, :], copy=True)
+
+        # optional per-group numeric defaults (ConditionalDefaults), used when a
+        # request gives the group field; one prebuilt template per group
+        self.conditional = None
+        self.group_templates = {}
+        self.group_defaults = {}
+        if conditional_path is not None and os.path.exists(conditional_path):
+            self.conditional = joblib.load(conditional_path)
+            self.group_keys = [k for k, c in self.aliases.items() if c == self.conditional.key]
+            self.group_plan = self.conditional.plan(self.numeric_cols)
+
+            groups = self.conditional.groups
+            rows = np.tile(self.numeric_row, (len(groups), 1))
+            self.conditional.fill(rows, self.group_plan, groups)
+            objects = np.tile(self.object_row, (len(groups), 1))
+            for i, group in enumerate(groups):
+                self.group_templates[group] = self._frame(rows[i:i + 1], objects[i:i + 1], copy=True)
+                self.group_defaults[group] = dict(zip(self.numeric_cols, rows[i].tolist()))
+
+    def _frame(self, numeric: np.ndarray, objects: np.ndarray, copy: bool = False) -> pd.DataFrame:
+        """
+        Frame in column order over the numeric and object blocks; with
+        copy=True the columns are consolidated into one block per dtype
+        """
+        data = {}
+        for col in self.columns:
+            is_numeric, j = self.slots[col]
+            data[col] = numeric[:, j] if is_numeric else objects[:, j]
+        return pd.DataFrame(data, copy=copy)
+
+    def _resolve(self, key):
+        return self.aliases.get(key) or self.aliases.get(key.replace("_", " "))
+
+    def _group_value(self, record: dict):
+        for key in self.group_keys:
+            if key in record:
+                return record[key]
+        return None
+
+    @staticmethod
+    def _numeric(value) -> float:
+        return np.nan if value is None else float(value)
+
+    def fill_defaults(self, user_input: dict) -> dict:
+        """
+        The record with every missing field filled as adapt() fills it:
+        group defaults first when the record gives a known group, then the
+        global defaults
+        """
         data = self.defaults.copy()
+        if self.conditional is not None:
+            data.update(self.group_defaults.get(self._group_value(user_input), {}))
 
         # overwrite defaults with user input
         for k, v in user_input.items():
-            data[k.replace("_", " ")] = v
+            data[self._resolve(k) or k.replace("_", " ")] = v
+
+        return data
+
+    def adapt(self, user_input: dict) -> pd.DataFrame:
+        """
+        One-row frame of the defaults with the provided fields patched in;
+        fields that are not model inputs are ignored
+        """
+        template = self.template
+        if self.conditional is not None:
+            template = self.group_templates.get(self._group_value(user_input), template)
+
+        df = template.copy()
+        for k, v in user_input.items():
+            col = self._resolve(k)
+            if col is None:
+                continue
+            is_numeric, _ = self.slots[col]
+            df.iat[0, self.positions[col]] = self._numeric(v) if is_numeric else v
+        return df
+
+    def adapt_batch(self, records: list) -> pd.DataFrame:
+        """
+        Builds one DataFrame for many records, one row per record in input order
+        """
+        # defaults broadcast over all rows, column-major so every column is contiguous
+        numeric = np.empty((len(records), len(self.numeric_cols)), order="F")
+        numeric[:] = self.numeric_row
+        if self.conditional is not None:
+            self.conditional.fill(numeric, self.group_plan, [self._group_value(r) for r in records])
+        objects = np.empty((len(records), len(self.object_cols)), dtype=object, order="F")
+        objects[:] = self.object_row
+
+        # patched column by column: one vectorized write per provided field
+        for key in dict.fromkeys(k for record in records for k in record):
+            col = self._resolve(key)
+            if col is None:
+                continue
+            values = [record.get(key, _MISSING) for record in records]
+            rows = slice(None)
+            if any(v is _MISSING for v in values):
+                rows = [i for i, v in enumerate(values) if v is not _MISSING]
+                values = [values[i] for i in rows]
+
+            is_numeric, j = self.slots[col]
+            if is_numeric:
+                # None becomes NaN
+                numeric[rows, j] = np.array(values, dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+                objects[rows, j] = column
 
-        return pd.DataFrame([data])
+        return self._frame(numeric, objects)
@@ -0,0 +1,387 @@
+import hashlib
+import json
+import math
+import numbers
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+from src.utils.config import PredictionCacheConfig
+
+logger = get_logger(__name__)
+
+# rough per-entry bookkeeping cost of the OrderedDict node and the entry tuple
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def _canonical_value(value):
+    """
+    Normalizes a feature value so equivalent inputs hash the same
+    (2 == 2.0, NaN == None)
+    """
+    if value is None:
+        return None
+    if isinstance(value, numbers.Number):
+        value = float(value)
+        return None if math.isnan(value) else value
+    return str(value)
+
+
+def make_cache_key(data: dict) -> str:
+    """
+    Canonical hash of a default-filled input record
+    """
+    canonical = sorted((k, _canonical_value(v)) for k, v in data.items())
+    payload = json.dumps(canonical, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class PredictionCache(ABC):
+    """
+    Interface of a prediction cache backend.
+
+    A backend stores float predictions under string keys with a TTL and
+    must stay within max_entries / max_bytes. A networked store (e.g. a
+    Redis-compatible service) implements it with SET key value EX ttl,
+    GET key and a delete of the cache's keys for clear().
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # counters are per process; shared backends report their own entry / byte totals
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _entry_size(self, key: str, value) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[float]:
+        """
+        The cached prediction, or None when missing or expired
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: float):
+        """
+        Stores a prediction, evicting entries to stay within the bounds
+        """
+
+    @abstractmethod
+    def clear(self):
+        """
+        Drops every entry
+        """
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        Hit, miss, eviction and expiration counters plus entry and byte totals
+        """
+
+
+class MemoryPredictionCache(PredictionCache):
+    """
+    Thread-safe in-process LRU cache with a TTL, bounded both by number of
+    entries and by an estimate of the bytes they hold.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024, ttl_seconds: float = 300):
+        super().__init__(max_entries, max_bytes, ttl_seconds)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: float):
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        logger.info("Prediction cache cleared")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+class SQLitePredictionCache(PredictionCache):
+    """
+    Cache shared by every worker process on the host, stored in a SQLite
+    file in WAL mode with memory-mapped reads. Entry and byte totals live
+    in a one-row table so the bounds are enforced without scanning, and
+    eviction is least recently used by last access time.
+
+    A hit records its access time only when the stored one is more than
+    touch_seconds old, so reads of hot keys stay reads instead of each
+    taking the database write lock; LRU order is kept to that resolution.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 300,
+        touch_seconds: float = 10.0
+    ):
+        super().__init__(max_entries, max_bytes, ttl_seconds)
+        self.path = path
+        self.touch_seconds = touch_seconds
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            connection = self._connection()
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS predictions (
+                    key TEXT PRIMARY KEY,
+                    value REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+                """
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_predictions_accessed ON predictions (accessed_at)"
+            )
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    entries INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL
+                )
+                """
+            )
+            connection.execute("INSERT OR IGNORE INTO cache_totals VALUES (0, 0, 0)")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA mmap_size={2 * self.max_bytes}")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _update_totals(self, connection: sqlite3.Connection, entries: int, size: int):
+        connection.execute(
+            "UPDATE cache_totals SET entries = entries + ?, bytes = bytes + ? WHERE id = 0",
+            (entries, size)
+        )
+
+    def _delete(self, connection: sqlite3.Connection, key: str) -> bool:
+        row = connection.execute("SELECT size FROM predictions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False
+        connection.execute("DELETE FROM predictions WHERE key = ?", (key,))
+        self._update_totals(connection, -1, -row[0])
+        return True
+
+    def get(self, key: str) -> Optional[float]:
+        try:
+            connection = self._connection()
+            now = time.time()
+            row = connection.execute(
+                "SELECT value, expires_at, accessed_at FROM predictions WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count("misses")
+                return None
+
+            value, expires_at, accessed_at = row
+            if expires_at <= now:
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self._delete(connection, key)
+                    connection.execute("COMMIT")
+                except Exception:
+                    connection.execute("ROLLBACK")
+                    raise
+                self._count("expirations")
+                self._count("misses")
+                return None
+
+            if now - accessed_at > self.touch_seconds:
+                connection.execute(
+                    "UPDATE predictions SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self._count("hits")
+            return value
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def set(self, key: str, value: float):
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+
+        try:
+            connection = self._connection()
+            now = time.time()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete(connection, key)
+                connection.execute(
+                    "INSERT INTO predictions VALUES (?, ?, ?, ?, ?)",
+                    (key, value, now + self.ttl_seconds, now, size)
+                )
+                self._update_totals(connection, 1, size)
+                self._evict(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _evict(self, connection: sqlite3.Connection):
+        entries, total_bytes = connection.execute(
+            "SELECT entries, bytes FROM cache_totals WHERE id = 0"
+        ).fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        # walk the least recently used rows until both bounds hold again
+        evicted, freed = 0, 0
+        for (size,) in connection.execute("SELECT size FROM predictions ORDER BY accessed_at"):
+            if entries - evicted <= self.max_entries and total_bytes - freed <= self.max_bytes:
+                break
+            evicted += 1
+            freed += size
+
+        connection.execute(
+            "DELETE FROM predictions WHERE key IN "
+            "(SELECT key FROM predictions ORDER BY accessed_at LIMIT ?)",
+            (evicted,)
+        )
+        self._update_totals(connection, -evicted, -freed)
+        self._count("evictions", evicted)
+
+    def clear(self):
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM predictions")
+                connection.execute("UPDATE cache_totals SET entries = 0, bytes = 0 WHERE id = 0")
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            logger.info("Prediction cache cleared")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def stats(self) -> dict:
+        entries, total_bytes = self._connection().execute(
+            "SELECT entries, bytes FROM cache_totals WHERE id = 0"
+        ).fetchone()
+        with self._counter_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": entries,
+                "bytes": total_bytes,
+            }
+
+
+def create_prediction_cache(config: PredictionCacheConfig) -> Optional[PredictionCache]:
+    """
+    Builds the cache backend selected in PredictionCacheConfig
+    """
+    if not config.enabled:
+        return None
+
+    logger.info(f"Using '{config.backend}' prediction cache backend")
+    if config.backend == "memory":
+        return MemoryPredictionCache(
+            max_entries=config.max_entries,
+            max_bytes=config.max_bytes,
+            ttl_seconds=config.ttl_seconds
+        )
+    if config.backend == "sqlite":
+        return SQLitePredictionCache(
+            config.sqlite_path,
+            max_entries=config.max_entries,
+            max_bytes=config.max_bytes,
+            ttl_seconds=config.ttl_seconds,
+            touch_seconds=config.sqlite_touch_seconds
+        )
+    raise ValueError(f"Unknown prediction cache backend: {config.backend}")
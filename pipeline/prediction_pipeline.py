@@ -1,31 +1,320 @@
+import os
 import sys
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
 import pandas as pd
 import numpy as np
 import joblib
 
 from src.utils.logger import get_logger
 from src.utils.exception import CustomException
-from src.utils.config import PredictionConfig
+from src.utils.config import PredictionConfig, PredictionCacheConfig
 from pipeline.input_adapter import InputAdapter
+from pipeline.compiled_predictor import CompiledPredictor
+from pipeline.compiled_forest import CompiledForest, is_compilable_forest
+from pipeline.compact_artifact import load_compact
+from pipeline.prediction_cache import create_prediction_cache, make_cache_key
+from src.utils.metrics import (
+    STAGE_SECONDS, PREDICTION_SECONDS, BATCH_ROWS, PREDICTIONS, PREDICTION_ERRORS
+)
 
 
 logger = get_logger(__name__)
 
+# label sets on the request path, resolved once
+ADAPTER_SECONDS = STAGE_SECONDS.labels("adapter")
+CACHE_SECONDS = STAGE_SECONDS.labels("cache")
+
+
+@dataclass
+class LoadedPipeline:
+    """
+    Everything served from one artifact, swapped in as a single reference
+    so a request never mixes state from two artifacts
+    """
+    pipeline: object
+    compiled: Optional[CompiledPredictor]
+    version: str
+    load_seconds: float
+    metrics: dict = field(default_factory=dict)
+    forest: Optional[CompiledForest] = None
+    # the input defaults written with this artifact
+    adapter: Optional[InputAdapter] = None
+
+
 class PredictionPipeline:
     def __init__(self):
         self.config = PredictionConfig()
-        self.pipeline = joblib.load("artifacts/model/full_pipeline.pkl")
-        self.adapter = InputAdapter("artifacts/input_defaults.pkl")
+
+        # the artifact is loaded once, on load_pipeline() or on the first prediction
+        self._active: Optional[LoadedPipeline] = None
+        self._load_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+        self._watcher = None
+        self._watcher_stop = threading.Event()
+
+        self.cache_config = PredictionCacheConfig()
+        self.cache = create_prediction_cache(self.cache_config)
+
+    @property
+    def pipeline(self):
+        return None if self._active is None else self._active.pipeline
+
+    @property
+    def adapter(self):
+        return None if self._active is None else self._active.adapter
+
+    @property
+    def compiled(self):
+        return None if self._active is None else self._active.compiled
+
+    @property
+    def model_version(self):
+        return None if self._active is None else self._active.version
+
+    @property
+    def load_seconds(self):
+        return None if self._active is None else self._active.load_seconds
+
+    @staticmethod
+    def _artifact_version(path: str) -> str:
+        """
+            Identifies the artifact on disk by size and modification time
+        """
+        stat = os.stat(path)
+        return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+    def _read_metrics(self) -> dict:
+        try:
+            with open(self.config.metrics_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning(f"No model metrics found at {self.config.metrics_path}")
+            return {}
+
+    def _compile_forest(self, pipeline) -> Optional[CompiledForest]:
+        """
+            Flattens a RandomForest model step; keeps model.predict if the
+            flattened forest does not reproduce its predictions exactly.
+        """
+        model = pipeline.steps[-1][1]
+        if not self.config.compile_forest or not is_compilable_forest(model):
+            return None
+        try:
+            forest = CompiledForest(model, max_batch_rows=self.config.forest_max_batch_rows)
+        except CustomException as e:
+            logger.warning(f"Compiled forest unavailable, using model.predict: {e}")
+            return None
+        if not forest.validate():
+            logger.warning("Compiled forest does not match model.predict, using model.predict")
+            return None
+        return forest
+
+    def _load_adapter(self) -> InputAdapter:
+        # read on every artifact load: training rewrites the defaults with the pipeline
+        return InputAdapter(self.config.input_defaults_path, self.config.conditional_defaults_path)
+
+    def _compile(self, pipeline, adapter: InputAdapter, forest=None) -> Optional[CompiledPredictor]:
+        """
+            Builds the NumPy fast path; keeps the sklearn path if the
+            fitted pipeline has steps the compiler does not support.
+        """
+        if not self.config.use_compiled_predictor:
+            return None
+        try:
+            return CompiledPredictor(pipeline, adapter.defaults, adapter.conditional, forest=forest)
+        except CustomException as e:
+            logger.warning(f"Compiled predictor unavailable, using sklearn pipeline: {e}")
+            return None
+
+    def _load_compact_artifact(self, path: str, version: str) -> LoadedPipeline:
+        """
+            A compact .npz artifact: served by the compiled predictor it
+            holds, with no sklearn pipeline behind it
+        """
+        start = time.perf_counter()
+        compiled, _ = load_compact(path, max_batch_rows=self.config.forest_max_batch_rows)
+        load_seconds = time.perf_counter() - start
+
+        logger.info(f"Compact pipeline loaded successfully! (version {version}, {load_seconds:.3f}s)")
+        return LoadedPipeline(
+            pipeline=None,
+            compiled=compiled,
+            version=version,
+            load_seconds=load_seconds,
+            metrics=self._read_metrics(),
+            forest=compiled.forest,
+            adapter=self._load_adapter()
+        )
+
+    def _load_artifact(self, path: str) -> LoadedPipeline:
+        logger.info(f"Loading full training saved pipeline from {path}")
+        version = self._artifact_version(path)
+        if path.endswith(".npz"):
+            return self._load_compact_artifact(path, version)
+
+        start = time.perf_counter()
+        # mmap_mode="r" maps the pickled NumPy arrays read-only from the page cache,
+        # so forked workers share them instead of holding private copies
+        pipeline = joblib.load(path, mmap_mode=self.config.mmap_mode)
+        load_seconds = time.perf_counter() - start
+
+        logger.info(f"Pipeline loaded successfully! (version {version}, {load_seconds:.3f}s)")
+        adapter = self._load_adapter()
+        forest = self._compile_forest(pipeline)
+        return LoadedPipeline(
+            pipeline=pipeline,
+            compiled=self._compile(pipeline, adapter, forest),
+            version=version,
+            load_seconds=load_seconds,
+            metrics=self._read_metrics(),
+            forest=forest,
+            adapter=adapter
+        )
+
+    def _activate(self, loaded: LoadedPipeline):
+        previous = self._active
+        self._active = loaded
+
+        # cached predictions belong to the previous artifact
+        if self.cache is not None and previous is not None and previous.version != loaded.version:
+            self.cache.clear()
 
     def load_pipeline(self):
         try:
-            logger.info("Loading full training saved pipeline")
-            self.pipeline = joblib.load(self.config.model_path)
-            logger.info("Pipeline loaded successfully!")
+            self._activate(self._load_artifact(self.config.model_path))
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _ensure_loaded(self) -> LoadedPipeline:
+        if self._active is None:
+            with self._load_lock:
+                if self._active is None:
+                    self.load_pipeline()
+        return self._active
+
+    def reload_pipeline(self, model_path: Optional[str] = None) -> str:
+        """
+            Loads an artifact next to the active one, checks it with a canary
+            prediction and only then swaps it in. Requests keep using the
+            previous artifact until the swap.
+        """
+        try:
+            with self._reload_lock:
+                path = model_path or self.config.model_path
+                loaded = self._load_artifact(path)
+
+                # canary: the training defaults must score to a finite price
+                canary = self._score(loaded, {})
+                if not math.isfinite(canary):
+                    raise ValueError(f"Canary prediction is not finite: {canary}")
+                logger.info(f"Canary prediction for version {loaded.version}: {canary:.2f}")
+
+                self._activate(loaded)
+                self.config.model_path = path
+                logger.info(f"Now serving pipeline version {loaded.version}")
+                return loaded.version
 
         except Exception as e:
+            logger.error("Pipeline reload failed, keeping the active pipeline")
             raise CustomException(e, sys)
-        
+
+    def start_model_watcher(self, interval_seconds: float):
+        """
+            Polls the configured artifact and hot-reloads it when it changes
+        """
+        if self._watcher is not None:
+            return
+
+        def watch():
+            failed_version = None
+            while not self._watcher_stop.wait(interval_seconds):
+                try:
+                    version = self._artifact_version(self.config.model_path)
+                except OSError:
+                    continue
+                if version in (self.model_version, failed_version):
+                    continue
+                logger.info(f"Detected new pipeline artifact (version {version})")
+                try:
+                    self.reload_pipeline()
+                except CustomException as e:
+                    # don't retry the same broken file until it changes again
+                    failed_version = version
+                    logger.error(f"Hot reload failed: {e}")
+
+        self._watcher_stop.clear()
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.config.model_path} every {interval_seconds}s")
+
+    def stop_model_watcher(self):
+        if self._watcher is not None:
+            self._watcher_stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def model_info(self) -> dict:
+        active = self._active
+        if active is None:
+            return {"loaded": False}
+        return {
+            "loaded": True,
+            "version": active.version,
+            "load_seconds": active.load_seconds,
+            "compiled": active.compiled is not None,
+            "compiled_forest": active.forest is not None,
+            "metrics": active.metrics,
+        }
+
+    def metrics(self) -> list:
+        """
+            Model and cache state for /metrics, read at scrape time
+        """
+        samples = []
+        active = self._active
+        if active is not None:
+            info = {"version": active.version, "compiled": str(active.compiled is not None).lower()}
+            samples += [
+                ("house_price_model_info", "gauge", "Loaded pipeline artifact", [(info, 1)]),
+                ("house_price_model_load_seconds", "gauge", "Time to load the active artifact",
+                 [({}, active.load_seconds)]),
+            ]
+        if self.cache is not None:
+            stats = self.cache.stats()
+            for name in ("hits", "misses", "evictions", "expirations"):
+                samples.append((
+                    f"house_price_cache_{name}_total", "counter", f"Prediction cache {name}",
+                    [({}, stats[name])]
+                ))
+            samples += [
+                ("house_price_cache_entries", "gauge", "Prediction cache entries", [({}, stats["entries"])]),
+                ("house_price_cache_bytes", "gauge", "Estimated prediction cache size", [({}, stats["bytes"])]),
+            ]
+        return samples
+
+    @staticmethod
+    def _run_pipeline(pipeline, X, forest: Optional[CompiledForest] = None):
+        """
+            pipeline.predict(X), timing every step under its own name;
+            a compiled forest scores in place of the model step
+        """
+        *transforms, (name, model) = pipeline.steps
+        for step_name, step in transforms:
+            if step is None or step == "passthrough":
+                continue
+            with STAGE_SECONDS.labels(step_name).time():
+                X = step.transform(X)
+        with STAGE_SECONDS.labels(name).time():
+            if forest is not None:
+                return forest.predict(X)
+            return model.predict(X)
+
     # def predict_results(self, input_data:dict):
     #     try:
     #         logger.info("Starting prediction")
@@ -43,17 +332,94 @@ class PredictionPipeline:
     #         return float(prediction[0])
     #     except Exception as e:
     #         raise CustomException(e, sys)
+    def _score(self, active: LoadedPipeline, input_data):
+        if active.compiled is not None and isinstance(input_data, dict):
+            return active.compiled.predict(input_data)
+
+        # ALWAYS go through the adapter
+        with ADAPTER_SECONDS.time():
+            df = active.adapter.adapt(input_data)
+
+        if active.pipeline is None:
+            # compact artifact: the compiled predictor is the only scorer
+            return float(active.compiled.predict_batch(df.to_dict("records"))[0])
+        prediction = self._run_pipeline(active.pipeline, df, active.forest)
+        return float(prediction[0])
+
+    def _score_batch(self, active: LoadedPipeline, records: list):
+        if active.compiled is not None:
+            predictions = active.compiled.predict_batch(records)
+        else:
+            with ADAPTER_SECONDS.time():
+                df = active.adapter.adapt_batch(records)
+            predictions = self._run_pipeline(active.pipeline, df, active.forest)
+        return [float(p) for p in predictions]
+
+    def _cache_key(self, active: LoadedPipeline, input_data: dict) -> str:
+        # key on the record as the adapter fills it (group defaults included) so
+        # sparse and full payloads share entries only when they score the same;
+        # the model version keeps workers on different artifacts apart in a shared backend
+        return f"{active.version}:{make_cache_key(active.adapter.fill_defaults(input_data))}"
+
     def predict_results(self, input_data: dict):
+        start = time.perf_counter()
         try:
             logger.info("Starting prediction")
+            active = self._ensure_loaded()
 
-            # ALWAYS go through the adapter
-            df = self.adapter.adapt(input_data)
-
-            prediction = self.pipeline.predict(df)
+            if self.cache is None or not isinstance(input_data, dict):
+                prediction = self._score(active, input_data)
+            else:
+                with CACHE_SECONDS.time():
+                    key = self._cache_key(active, input_data)
+                    prediction = self.cache.get(key)
+                if prediction is None:
+                    prediction = self._score(active, input_data)
+                    self.cache.set(key, prediction)
 
             logger.info("Prediction completed successfully!")
-            return float(prediction[0])
+            PREDICTIONS.labels("single").inc()
+            PREDICTION_SECONDS.labels("single").observe(time.perf_counter() - start)
+            return prediction
+
+        except Exception as e:
+            PREDICTION_ERRORS.labels("single").inc()
+            raise CustomException(e, sys)
+
+    def predict_batch(self, records: list):
+        """
+            Scores many records with a single pass through the pipeline.
+            Returns predictions in the same order as the input records.
+        """
+        start = time.perf_counter()
+        try:
+            logger.info(f"Starting batch prediction for {len(records)} records")
+
+            if not records:
+                return []
+
+            active = self._ensure_loaded()
+
+            if self.cache is None:
+                predictions = self._score_batch(active, records)
+            else:
+                # only the cache misses go through the pipeline
+                with CACHE_SECONDS.time():
+                    keys = [self._cache_key(active, record) for record in records]
+                    predictions = [self.cache.get(key) for key in keys]
+                missing = [i for i, p in enumerate(predictions) if p is None]
+                if missing:
+                    scored = self._score_batch(active, [records[i] for i in missing])
+                    for i, prediction in zip(missing, scored):
+                        predictions[i] = prediction
+                        self.cache.set(keys[i], prediction)
+
+            logger.info("Batch prediction completed successfully!")
+            PREDICTIONS.labels("batch").inc(len(records))
+            BATCH_ROWS.labels().observe(len(records))
+            PREDICTION_SECONDS.labels("batch").observe(time.perf_counter() - start)
+            return predictions
 
         except Exception as e:
+            PREDICTION_ERRORS.labels("batch").inc()
             raise CustomException(e, sys)
@@ -1,10 +1,10 @@
-import pandas as pd
 from pipeline.prediction_pipeline import PredictionPipeline
-from src.utils.config import DataIngestionConfig
+from src.data_ingestion import DataIngestionConfig
+from src.utils.columnar import read_table
 
 # Load test data using config
 config = DataIngestionConfig()
-test_df = pd.read_csv(config.test_data_path)
+test_df = read_table(config.test_data_path)
 
 # Take ONE ROW, DROP TARGET, KEEP FULL SCHEMA
 sample_test_input = test_df.drop(columns=["SalePrice"]).iloc[[0]]
@@ -1,18 +1,26 @@
+import os
 import sys
-import pandas as pd
+import time
 
 from src.utils.logger import get_logger
 from src.utils.exception import CustomException
+from src.utils.config import (
+    StageCacheConfig, EncodingConfig, InputDefaultsConfig, ModelTrainingConfig, CompactExportConfig,
+    PredictionConfig
+)
+from src.utils.stage_cache import StageCache, code_fingerprint
+from src.utils.columnar import load_columnar, read_schema
+from src.utils.input_defaults import defaults_from_frame, conditional_defaults, save_defaults
 
 from src.data_ingestion import DataIngestion
-from src.data_preprocessing import DataPreprocessing
 from src.feature_engineering import FeatureEngineering
 from src.encoding import DataEncoding
-from src.scaling import DataScaling
+from src.fused_preprocessing import FusedPreprocessor
 from src.outlier_handling import OutlierHandler
-from src.model_training import ModelTrainer
+from src.model_training import ModelTrainer, DENSE_ONLY_MODELS
 from src.model_selection import ModelSelector
 from src.model_evaluation import ModelEvaluation
+from pipeline.compact_artifact import export_compact, load_compact, accuracy_deltas
 import joblib
 from sklearn.pipeline import Pipeline
 
@@ -20,101 +28,288 @@ logger = get_logger(__name__)
 
 
 class TrainingPipeline:
-    def run_pipeline(self):
+    def export_compact_model(self, full_pipeline, defaults: dict, conditional, X_test, y_test,
+                             model_name: str, path: str) -> dict:
+        """
+        Saves the pipeline as a compact artifact at path (the caller moves it
+        into place), reloads it and scores the raw test split with both, so
+        the cost of the reduced precision is reported next to the model's metrics.
+
+        Returns:
+            dict: Export path, size and the accuracy deltas, or why it was skipped.
+        """
+        config = CompactExportConfig()
+        try:
+            manifest = export_compact(
+                full_pipeline, defaults, path, conditional=conditional,
+                precision=config.precision, metadata={"model_name": model_name}
+            )
+        except CustomException as e:
+            # e.g. boosting models, which the compiled predictor does not cover
+            logger.warning(f"Compact export skipped: {e}")
+            return {"exported": False, "reason": str(e)}
+
+        start = time.perf_counter()
+        predictor, _ = load_compact(path)
+        load_seconds = time.perf_counter() - start
+
+        reference = full_pipeline.predict(X_test)
+        compact = predictor.predict_batch(X_test.to_dict("records"))
+        report = {
+            "exported": True,
+            "path": config.path,
+            "precision": config.precision,
+            "model_type": manifest["model"]["type"],
+            "bytes": os.path.getsize(path),
+            "load_seconds": load_seconds,
+            **accuracy_deltas(y_test, reference, compact),
+        }
+        logger.info(
+            f"Compact artifact: {report['bytes']} bytes, test R2 delta {report['test_r2_delta']:.2e}, "
+            f"max prediction delta {report['max_abs_prediction_delta']:.4f}"
+        )
+        return report
+
+    def run_pipeline(self, data_path=None) -> dict:
+        """
+        Runs every phase and saves the full pipeline.
+
+        Returns:
+            dict: Wall time of each phase ("stages") and of the whole run ("total_seconds").
+        """
         try:
             logger.info("Training pipeline started")
+            pipeline_start = time.perf_counter()
+            timings = {}
+
+            # every phase is keyed by its input's key + its own code, so
+            # unchanged phases are loaded from artifacts/cache instead of recomputed
+            cache_config = StageCacheConfig()
+            cache = StageCache(
+                cache_config.cache_dir,
+                enabled=cache_config.enabled,
+                keep_per_stage=cache_config.keep_per_stage
+            )
 
             # Phase 2: Data Ingestion
             ingestion = DataIngestion()
-            train_path, test_path = ingestion.initate_data_ingestion()
+            target_col = "SalePrice"
 
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            # ingestion keeps its own typed columnar copy of the splits and skips
+            # re-splitting while the raw file is unchanged, so it is not cached here
+            ingestion_start = time.perf_counter()
+            train_path, test_path = ingestion.initate_data_ingestion(data_path)
 
-            target_col = "SalePrice"
+            # the splits are memory-mapped, not re-parsed
+            train_df = load_columnar(train_path)
+            test_df = load_columnar(test_path)
 
+            X_train = train_df.drop(columns=[target_col])
+            X_test = test_df.drop(columns=[target_col])
+            # raw test inputs, scored again through the compact artifact
+            X_test_raw = X_test
             y_train = train_df[target_col]
             y_test = test_df[target_col]
+            timings["ingestion"] = time.perf_counter() - ingestion_start
+            logger.info(f"Stage [ingestion] finished in {timings['ingestion']:.3f}s")
 
-            X_train = train_df.drop(columns=[target_col])
-            X_test = test_df.drop(columns=[target_col])
+            # serving defaults for missing request fields, from the training inputs in memory;
+            # saved with the pipeline at the end, so a failed run leaves the old pair in place
+            defaults_start = time.perf_counter()
+            defaults_config = InputDefaultsConfig()
+            defaults = defaults_from_frame(X_train)
+            conditional = None
+            if defaults_config.group_by is not None:
+                conditional = conditional_defaults(
+                    X_train, defaults_config.group_by, defaults_config.min_group_size
+                )
+            timings["input_defaults"] = time.perf_counter() - defaults_start
+
+            # the split metadata holds the raw data hash and the split settings
+            key = cache.key(
+                "ingestion", read_schema(train_path)["metadata"], target_col,
+                code_fingerprint(DataIngestion, load_columnar)
+            )
 
             # Phase 3: Feature Engineering (DATAFRAME ONLY)
             fe = FeatureEngineering()
-            X_train = fe.transform(X_train)
-            X_test = fe.transform(X_test)
+            key = cache.key("feature_engineering", key, code_fingerprint(FeatureEngineering))
+            X_train, X_test = cache.run(
+                "feature_engineering", key,
+                lambda: (fe.transform(X_train), fe.transform(X_test))
+            )
 
             # Phase 4: Outlier Handling
-            outlier = OutlierHandler()
+            def handle_outliers():
+                outlier = OutlierHandler()
 
-            # identigy numeric columns and exclude the target
-            numeric_cols = X_train.select_dtypes(include=["int64", "float64"]).columns.tolist()
-            
-            # learn outlier bounds(lower & upper) from training data
-            outlier.fit(X_train, numeric_cols)
+                # identigy numeric columns and exclude the target
+                numeric_cols = X_train.select_dtypes(include=["int64", "float64"]).columns.tolist()
 
-            X_train = outlier.transform(X_train)
-            X_test = outlier.transform(X_test)
+                # learn outlier bounds(lower & upper) from training data
+                outlier.fit(X_train, numeric_cols)
 
-            # Phase 5: Encoding (NEEDS COLUMN NAMES)
-            encoder = DataEncoding()
-            encoding_transformer = encoder.get_transformer(X_train)
+                return outlier, outlier.transform(X_train), outlier.transform(X_test)
 
-            X_train = encoding_transformer.fit_transform(X_train)
-            X_test = encoding_transformer.transform(X_test)
+            key = cache.key("outlier_handler", key, code_fingerprint(OutlierHandler))
+            outlier, X_train, X_test = cache.run("outlier_handler", key, handle_outliers)
+            outlier_key, train_frame, test_frame = key, X_train, X_test
 
-            # Phase 6: Imputation
-            preprocessing = DataPreprocessing()
-            preprocessor = preprocessing.get_preprocessor_object(
-                pd.DataFrame(X_train)
-            )
+            trainer = ModelTrainer()
+            selector = ModelSelector()
+            sparse_onehot = EncodingConfig().sparse_onehot
 
-            X_train = preprocessor.fit_transform(X_train)
-            X_test = preprocessor.transform(X_test)
+            if sparse_onehot:
+                # Phase 5-7: impute -> encode -> scale in one step, one-hot block kept CSR
+                def preprocess_sparse():
+                    transformer = DataEncoding().get_sparse_transformer(X_train)
 
-            # Phase 7: Scaling
-            scaler = DataScaling()
-            scaler_transformer = scaler.get_scaled_features(pd.DataFrame(X_train))
+                    return (
+                        transformer,
+                        transformer.fit_transform(X_train),
+                        transformer.transform(X_test),
+                    )
 
-            X_train = scaler_transformer.fit_transform(X_train)
-            X_test = scaler_transformer.transform(X_test)
+                key = cache.key("sparse_preprocessing", key, code_fingerprint(DataEncoding))
+                sparse_transformer, X_train, X_test = cache.run(
+                    "sparse_preprocessing", key, preprocess_sparse
+                )
+                preprocessing_steps = [("preprocessing", sparse_transformer)]
+            else:
+                # Phase 5-7: impute -> encode -> scale fused into one pass
+                def preprocess():
+                    transformer = DataEncoding().get_fused_transformer()
 
-            # Phase 9: Model Training
-            trainer = ModelTrainer()
-            trained_models = trainer.train_and_evaluate(
-                X_train, y_train, X_test, y_test
-            )
+                    return (
+                        transformer,
+                        transformer.fit_transform(X_train),
+                        transformer.transform(X_test),
+                    )
 
-            # Phase 10: Model Selection
-            selector = ModelSelector()
-            best_model_name, best_model, metrics = selector.select_best_model(
-                trained_models
+                key = cache.key(
+                    "preprocessing", key, code_fingerprint(DataEncoding, FusedPreprocessor)
+                )
+                preprocessor, X_train, X_test = cache.run("preprocessing", key, preprocess)
+                preprocessing_steps = [("preprocessing", preprocessor)]
+
+            # gradient boosting splits nominal columns as category codes, so it
+            # gets its own preprocessing without the one-hot expansion (the CV
+            # search compares every candidate on the same one-hot matrix)
+            native_inputs, native_steps = None, None
+            native = ModelTrainingConfig().native_categorical and not selector.config.search
+            if native and trainer.native_models():
+                def preprocess_native():
+                    transformer = DataEncoding().get_fused_transformer(native_categorical=True)
+
+                    return (
+                        transformer,
+                        transformer.fit_transform(train_frame),
+                        transformer.transform(test_frame),
+                    )
+
+                native_key = cache.key(
+                    "native_preprocessing", outlier_key, code_fingerprint(DataEncoding, FusedPreprocessor)
+                )
+                native_preprocessor, X_train_native, X_test_native = cache.run(
+                    "native_preprocessing", native_key, preprocess_native
+                )
+                native_inputs = (X_train_native, X_test_native, native_preprocessor.categorical_mask_)
+                native_steps = [("preprocessing", native_preprocessor)]
+            elif sparse_onehot:
+                # the serving pipeline would hand these models the sparse matrix
+                for name, model in list(trainer.models.items()):
+                    if isinstance(model, DENSE_ONLY_MODELS):
+                        logger.warning(f"Skipping {name}: it needs dense input")
+                        del trainer.models[name]
+
+            logger.info(
+                f"Preprocessing finished in {time.perf_counter() - pipeline_start:.2f}s "
+                f"({sum(r['cache_hit'] for r in cache.report)}/{len(cache.report)} stages from cache)"
             )
+            timings.update({r["stage"]: r["seconds"] for r in cache.report})
+
+            training_start = time.perf_counter()
+
+            if selector.config.search:
+                # Phase 9 + 10: cross-validated hyperparameter search
+                best_model_name, best_model, metrics = selector.search_best_model(
+                    trainer.models, X_train, y_train, X_test, y_test
+                )
+            else:
+                # Phase 9: Model Training
+                trained_models = trainer.train_and_evaluate(
+                    X_train, y_train, X_test, y_test, native_inputs=native_inputs
+                )
+
+                # Phase 10: Model Selection
+                best_model_name, best_model, metrics = selector.select_best_model(
+                    trained_models
+                )
+
+                # serve the winner behind the encoding it was trained on
+                if best_model_name is not None and trained_models[best_model_name]["input"] == "native":
+                    preprocessing_steps = native_steps
+
+                # per-candidate scores, fit time and peak memory for the report
+                metrics["candidates"] = {
+                    name: {k: v for k, v in result.items() if k != "model"}
+                    for name, result in trained_models.items()
+                }
+
+            timings["model_training"] = time.perf_counter() - training_start
 
             # Phase 11:
             # Creating and saving a full production pipeline
+            save_start = time.perf_counter()
             logger.info("Creating a full production pipeline")
             full_pipeline = Pipeline(steps=[
                 ("feature_engineering", fe),
                 ("outlier_handler", outlier),
-                ("encoding", encoding_transformer),
-                ("imputation", preprocessor),
-                ("scaling", scaler_transformer),
-                ("model", best_model)  
+                *preprocessing_steps,
+                ("model", best_model)
             ])
 
-            pipeline_path = "artifacts/model/full_pipeline.pkl"
-            joblib.dump(full_pipeline, pipeline_path)
-
+            # the paths serving loads and watches, anchored at the project root
+            # whatever the working directory
+            prediction_config = PredictionConfig()
+            pipeline_path = prediction_config.model_path
+            if pipeline_path.endswith(".npz"):
+                # serving reads the compact export; the pickle goes next to it
+                pipeline_path = f"{os.path.splitext(pipeline_path)[0]}.pkl"
+            # write to a temp file and rename so a serving process watching
+            # the artifact never reads a half-written pickle
+            tmp_path = f"{pipeline_path}.tmp"
+            os.makedirs(os.path.dirname(pipeline_path), exist_ok=True)
+            joblib.dump(full_pipeline, tmp_path)
             logger.info(f"Best model is - {best_model}")
-            logger.info(f"Full pipeline saved at {pipeline_path}")
-            
+
             # Phase 12: Save model & metrics
             evaluator = ModelEvaluation()
             evaluator.save_model(best_model, best_model_name)
-            evaluator.save_metrics(metrics)
 
-            logger.info("Training pipeline completed successfully")
+            # Phase 13: compact, pickle-free copy with its accuracy deltas in the metrics
+            compact_config = CompactExportConfig()
+            compact_tmp_path = f"{compact_config.path}.pending.npz"
+            if compact_config.enabled:
+                metrics["compact_export"] = self.export_compact_model(
+                    full_pipeline, defaults, conditional, X_test_raw, y_test, best_model_name,
+                    compact_tmp_path
+                )
+
+            # metrics and defaults first: a server reloading on the new artifact reads them on load
+            evaluator.save_metrics(metrics, prediction_config.metrics_path)
+            save_defaults(
+                defaults, defaults_config.defaults_path, conditional, defaults_config.conditional_path
+            )
+            if compact_config.enabled and metrics["compact_export"]["exported"]:
+                os.replace(compact_tmp_path, compact_config.path)
+            os.replace(tmp_path, pipeline_path)
+            logger.info(f"Full pipeline saved at {pipeline_path}")
+            timings["save"] = time.perf_counter() - save_start
+
+            total_seconds = time.perf_counter() - pipeline_start
+            logger.info(f"Training pipeline completed successfully in {total_seconds:.2f}s")
+            return {"stages": timings, "total_seconds": total_seconds}
 
         except Exception as e:
             logger.error("Training pipeline failed")
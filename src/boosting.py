@@ -0,0 +1,114 @@
+import sys
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.model_selection import train_test_split
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+
+try:
+    import xgboost
+except ImportError:
+    # optional: the XGBoost candidate is skipped without it
+    xgboost = None
+
+logger = get_logger(__name__)
+
+
+class XGBoostHistRegressor(BaseEstimator, RegressorMixin):
+    """
+    XGBoost with the histogram tree method, behind the same fit(X, y) as
+    the other candidates. Early stopping holds out validation_fraction of
+    the training rows, like HistGradientBoostingRegressor does, instead of
+    needing an eval_set from the caller. Columns flagged in the
+    categorical_features mask are split natively as categories (codes,
+    NaN for missing).
+    """
+
+    def __init__(
+        self,
+        n_estimators=1000,
+        learning_rate=0.05,
+        max_depth=6,
+        max_bin=256,
+        subsample=0.8,
+        colsample_bytree=0.8,
+        min_child_weight=1.0,
+        reg_lambda=1.0,
+        early_stopping_rounds=30,
+        validation_fraction=0.1,
+        categorical_features=None,
+        n_jobs=None,
+        random_state=42
+    ):
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.max_bin = max_bin
+        self.subsample = subsample
+        self.colsample_bytree = colsample_bytree
+        self.min_child_weight = min_child_weight
+        self.reg_lambda = reg_lambda
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.categorical_features = categorical_features
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _feature_types(self, n_features: int):
+        if self.categorical_features is None:
+            return None
+        mask = np.asarray(self.categorical_features, dtype=bool)
+        if not mask.any():
+            return None
+        return ["c" if is_categorical else "q" for is_categorical in mask[:n_features]]
+
+    def fit(self, X, y):
+        try:
+            if xgboost is None:
+                raise ImportError("XGBoostHistRegressor needs the xgboost package")
+
+            y = np.asarray(y, dtype=np.float64)
+            feature_types = self._feature_types(X.shape[1])
+            early_stopping = self.early_stopping_rounds and self.validation_fraction
+
+            self.model_ = xgboost.XGBRegressor(
+                tree_method="hist",
+                n_estimators=self.n_estimators,
+                learning_rate=self.learning_rate,
+                max_depth=self.max_depth,
+                max_bin=self.max_bin,
+                subsample=self.subsample,
+                colsample_bytree=self.colsample_bytree,
+                min_child_weight=self.min_child_weight,
+                reg_lambda=self.reg_lambda,
+                early_stopping_rounds=self.early_stopping_rounds if early_stopping else None,
+                feature_types=feature_types,
+                enable_categorical=feature_types is not None,
+                n_jobs=self.n_jobs,
+                random_state=self.random_state
+            )
+
+            if early_stopping:
+                X_fit, X_val, y_fit, y_val = train_test_split(
+                    X, y, test_size=self.validation_fraction, random_state=self.random_state
+                )
+                self.model_.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+                self.n_iter_ = self.model_.best_iteration + 1
+            else:
+                self.model_.fit(X, y, verbose=False)
+                self.n_iter_ = self.n_estimators
+
+            self.n_features_in_ = X.shape[1]
+            logger.info(f"XGBoost fitted with {self.n_iter_} trees")
+            return self
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict(self, X):
+        # n_jobs may have been changed since fit (training vs serving threads)
+        if self.model_.n_jobs != self.n_jobs:
+            self.model_.set_params(n_jobs=self.n_jobs)
+        # predict() stops at the best iteration when early stopping was used
+        return self.model_.predict(X)
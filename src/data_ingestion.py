@@ -6,11 +6,16 @@
 import os 
 import sys
 from venv import logger
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from dataclasses import dataclass
+from typing import Optional
 from src.utils.exception import CustomException
 from src.utils.logger import get_logger
+from src.utils.columnar import ColumnarWriter, save_columnar, read_schema, read_table
+from src.utils.sketches import StreamingStats
+from src.utils.stage_cache import file_fingerprint
 from pathlib import Path
 
 logger = get_logger(__name__)
@@ -21,46 +26,200 @@ RAW_DATA_PATH = PROJECT_ROOT/"data"/"raw"/"AmesHousing.csv"
 # configuration for data ingestion
 @dataclass
 class DataIngestionConfig :
-    raw_data_path:str = os.path.join('artifacts', 'raw_data.csv')
-    train_data_path:str = os.path.join('artifacts', 'train_data.csv')
-    test_data_path:str = os.path.join('artifacts', 'test_data.csv')
+    # columnar datasets (see src/utils/columnar.py); CSV is only for import/export
+    raw_data_path:str = os.path.join('artifacts', 'raw_data')
+    train_data_path:str = os.path.join('artifacts', 'train_data')
+    test_data_path:str = os.path.join('artifacts', 'test_data')
+    # also write train/test as CSV next to the columnar datasets
+    export_csv:bool = False
+    test_size:float = 0.2
+    random_state:int = 42
+    # running statistics of the train split (medians, quartiles, category counts)
+    stats_path:str = os.path.join('artifacts', 'train_stats.json')
+    stats_sample_size:int = 10000
+
+    # streaming mode: read the raw CSV in chunks and split rows by hash, so
+    # peak memory depends on chunk_size instead of on the dataset size
+    streaming:bool = False
+    chunk_size:int = 100_000
+    # column hashed to assign rows to train/test (None = row number)
+    split_key:Optional[str] = None
+    # explicit dtypes for columns the first chunk can't infer reliably
+    dtypes:Optional[dict] = None
 
 class DataIngestion:
     def __init__(self):
         self.ingestion_config = DataIngestionConfig()
 
+    def _split_metadata(self, source_fingerprint:str) -> dict:
+        config = self.ingestion_config
+        metadata = {
+            "source": source_fingerprint,
+            "split": "hash" if config.streaming else "random",
+            "test_size": config.test_size,
+            "random_state": config.random_state,
+        }
+        if config.streaming:
+            metadata["split_key"] = config.split_key
+        return metadata
+
+    def _is_up_to_date(self, path:str, metadata:dict) -> bool:
+        schema = read_schema(path)
+        return schema is not None and schema["metadata"] == metadata
+
+    def _splits_up_to_date(self, split:dict) -> bool:
+        config = self.ingestion_config
+        return (
+            self._is_up_to_date(config.train_data_path, split)
+            and self._is_up_to_date(config.test_data_path, split)
+            and os.path.exists(config.stats_path)
+        )
+
+    def _test_mask(self, chunk:pd.DataFrame, start:int) -> np.ndarray:
+        """
+        Deterministic train/test assignment of the rows of a chunk: a row is
+        in the test split when the hash of its key (or of its row number)
+        falls in the first test_size share of the hash space.
+        """
+        config = self.ingestion_config
+        hash_key = f"{config.random_state:016d}"[-16:]
+
+        if config.split_key is not None:
+            hashes = pd.util.hash_pandas_object(
+                chunk[config.split_key], index=False, hash_key=hash_key
+            ).to_numpy()
+        else:
+            rows = np.arange(start, start + len(chunk), dtype=np.int64)
+            hashes = pd.util.hash_array(rows, hash_key=hash_key)
+
+        buckets = 1_000_000
+        return (hashes % buckets) < round(config.test_size * buckets)
+
+    def initiate_streaming_ingestion(self, data_path=None):
+        '''
+        Chunked version of initate_data_ingestion for raw files larger than
+        memory: rows are assigned to train/test by hash, both splits are
+        written chunk by chunk and the train statistics are computed in the
+        same pass.
+        '''
+        logger.info("Streaming data ingestion method starts")
+        try:
+            if data_path is None:
+                data_path = RAW_DATA_PATH
+
+            config = self.ingestion_config
+            split = self._split_metadata(file_fingerprint(data_path))
+
+            if self._splits_up_to_date(split):
+                logger.info("Train and test data are up to date with the raw data, skipping ingestion")
+                return config.train_data_path, config.test_data_path
+
+            # the first chunk fixes the schema: text columns are read as str in
+            # every chunk, numeric ones are narrowed to int64 at the end if no
+            # chunk needed floats (the same rule as a single pd.read_csv)
+            sample = pd.read_csv(data_path, nrows=config.chunk_size)
+            dtypes = {c: str for c in sample.columns if sample[c].dtype == object}
+            dtypes.update(config.dtypes or {})
+            int_candidates = [
+                c for c in sample.select_dtypes(include="number").columns if c not in dtypes
+            ]
+            del sample
+
+            os.makedirs(os.path.dirname(config.train_data_path) or ".", exist_ok=True)
+            train_writer = ColumnarWriter(config.train_data_path, metadata=split, int_candidates=int_candidates)
+            test_writer = ColumnarWriter(config.test_data_path, metadata=split, int_candidates=int_candidates)
+            stats = StreamingStats(config.stats_sample_size, config.random_state)
+
+            start = 0
+            for chunk in pd.read_csv(data_path, chunksize=config.chunk_size, dtype=dtypes):
+                is_test = self._test_mask(chunk, start)
+                train_chunk = chunk[~is_test]
+                test_chunk = chunk[is_test]
+
+                train_writer.append(train_chunk)
+                test_writer.append(test_chunk)
+                stats.update(train_chunk)
+
+                if config.export_csv:
+                    mode = "w" if start == 0 else "a"
+                    train_chunk.to_csv(f"{config.train_data_path}.csv", mode=mode, header=start == 0, index=False)
+                    test_chunk.to_csv(f"{config.test_data_path}.csv", mode=mode, header=start == 0, index=False)
+
+                start += len(chunk)
+
+            train_writer.close()
+            test_writer.close()
+            stats.save(config.stats_path)
+
+            logger.info(f"Streaming data ingestion completed ({start} rows)")
+            return config.train_data_path, config.test_data_path
+
+        except Exception as e:
+            logger.error("Error occurred in streaming data ingestion")
+            raise CustomException(e, sys)
+
     def initate_data_ingestion(self, data_path=None):
         '''
         This function is used to read raw data from various sources,
         perform train/test splitting
         and save the raw data, train data, test data for further use.
+
+        The raw CSV is parsed only when it changed since the last run; the
+        splits are written as typed columnar datasets.
         '''
+        if self.ingestion_config.streaming:
+            return self.initiate_streaming_ingestion(data_path)
+
         logger.info("Data Ingestion method starts")
         try:
             # read the raw data
             if data_path is None:
-                data_path = '../data/raw/AmesHousing.csv'
-            df = pd.read_csv(RAW_DATA_PATH)
+                data_path = RAW_DATA_PATH
+
+            config = self.ingestion_config
+            source = {"source": file_fingerprint(data_path)}
+            split = self._split_metadata(source["source"])
+
+            if self._splits_up_to_date(split):
+                logger.info("Train and test data are up to date with the raw data, skipping ingestion")
+                return config.train_data_path, config.test_data_path
+
+            if self._is_up_to_date(config.raw_data_path, source):
+                df = read_table(config.raw_data_path)
+                logger.info("Raw data loaded from columnar copy")
+            else:
+                df = read_table(str(data_path))
 
-            # create the artifacts directory if not exists
-            os.makedirs(os.path.dirname(self.ingestion_config.raw_data_path), exist_ok=True)
+                # create the artifacts directory if not exists
+                os.makedirs(os.path.dirname(config.raw_data_path), exist_ok=True)
 
-            # save the raw data
-            df.to_csv(self.ingestion_config.raw_data_path, index=False)
-            logger.info("Raw data saved")
+                # save the raw data
+                save_columnar(df, config.raw_data_path, metadata=source)
+                logger.info("Raw data saved")
 
             # split the data into train and test sets
-            train_df, test_df = train_test_split(df, test_size=0.2, random_state=42)
+            train_df, test_df = train_test_split(
+                df, test_size=config.test_size, random_state=config.random_state
+            )
 
             # save the train data and test data
-            train_df.to_csv(self.ingestion_config.train_data_path, index=False)
-            test_df.to_csv(self.ingestion_config.test_data_path, index=False)
+            save_columnar(train_df.reset_index(drop=True), config.train_data_path, metadata=split)
+            save_columnar(test_df.reset_index(drop=True), config.test_data_path, metadata=split)
+
+            stats = StreamingStats(config.stats_sample_size, config.random_state)
+            stats.update(train_df)
+            stats.save(config.stats_path)
+
+            if config.export_csv:
+                train_df.to_csv(f"{config.train_data_path}.csv", index=False)
+                test_df.to_csv(f"{config.test_data_path}.csv", index=False)
+
             logger.info("Train and test data saved")    
             logger.info("Data Ingestion method completed")
 
             return (
-                self.ingestion_config.train_data_path,
-                self.ingestion_config.test_data_path
+                config.train_data_path,
+                config.test_data_path
             )
         except Exception as e:
             logger.error("Error occurred in data ingestion")
@@ -16,6 +16,7 @@ from sklearn.pipeline import Pipeline
 from src.utils.exception import CustomException
 from src.utils.logger import get_logger
 from src.utils.common import save_model_object
+from src.utils.columnar import read_table
 from src.utils.config import PreprocessorConfig
 
 logger = get_logger(__name__)
@@ -70,8 +71,8 @@ class DataPreprocessing:
         logger.info("Data Preprocessing method starts")
         try:
             logger.info("Reading train and test data")
-            train_df = pd.read_csv(train_path)
-            test_df = pd.read_csv(test_path)
+            train_df = read_table(train_path)
+            test_df = read_table(test_path)
 
             target_column = 'SalePrice'
 
@@ -1,11 +1,14 @@
 import sys
 import pandas as pd
 
-from sklearn.preprocessing import OrdinalEncoder, OneHotEncoder
+from sklearn.preprocessing import OrdinalEncoder, OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
 
 from src.utils.logger import get_logger
 from src.utils.exception import CustomException
+from src.fused_preprocessing import FusedPreprocessor
 
 logger = get_logger(__name__)
 
@@ -64,3 +67,73 @@ class DataEncoding:
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def get_fused_transformer(self, native_categorical: bool = False) -> FusedPreprocessor:
+        """
+        Build the single-step imputation, encoding and scaling transformer,
+        equivalent to the encoding, imputation and scaling ColumnTransformers.
+        With native_categorical=True nominal columns are kept as category
+        codes for gradient boosting instead of being one-hot expanded.
+        """
+        try:
+            logger.info("Creating fused preprocessing transformer")
+            return FusedPreprocessor(
+                ordinal_categories=self.ordinal_cols,
+                nominal_encoding="native" if native_categorical else "onehot"
+            )
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_sparse_transformer(self, df: pd.DataFrame) -> ColumnTransformer:
+        """
+        Build one sparse-aware transformer doing imputation, encoding and
+        scaling. Nominals are imputed before expansion and a missing ordinal
+        encodes to -1, as in the dense and fused transformers. The one-hot
+        block stays CSR and only the dense numeric and ordinal blocks are
+        scaled, so centering never densifies the one-hot columns.
+        """
+        try:
+            logger.info("Creating sparse encoding transformer")
+
+            categorical_cols = df.select_dtypes(include="object").columns.tolist()
+            numerical_cols = df.select_dtypes(include=["int64", "float64"]).columns.tolist()
+
+            nominal_cols = [
+                col for col in categorical_cols if col not in self.ordinal_features
+            ]
+
+            numeric_pipeline = Pipeline(steps=[
+                ("imputer", SimpleImputer(strategy="median")),
+                ("scaler", StandardScaler())
+            ])
+
+            ordinal_pipeline = Pipeline(steps=[
+                ("encoder", OrdinalEncoder(
+                    categories=self.ordinal_categories,
+                    handle_unknown="use_encoded_value",
+                    unknown_value=-1
+                )),
+                ("scaler", StandardScaler())
+            ])
+
+            nominal_pipeline = Pipeline(steps=[
+                ("imputer", SimpleImputer(strategy="most_frequent")),
+                ("encoder", OneHotEncoder(handle_unknown="ignore", sparse_output=True))
+            ])
+
+            transformer = ColumnTransformer(
+                transformers=[
+                    ("numeric", numeric_pipeline, numerical_cols),
+                    ("ordinal", ordinal_pipeline, self.ordinal_features),
+                    ("nominal", nominal_pipeline, nominal_cols),
+                ],
+                # always return CSR, whatever the overall density
+                sparse_threshold=1.0
+            )
+
+            logger.info("Sparse encoding transformer created successfully")
+            return transformer
+
+        except Exception as e:
+            raise CustomException(e, sys)
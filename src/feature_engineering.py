@@ -1,4 +1,6 @@
 import sys
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
 
@@ -8,7 +10,80 @@ from src.utils.exception import CustomException
 logger = get_logger(__name__)
 
 
+@dataclass(frozen=True)
+class DerivedFeature:
+    """
+    One engineered column: a weighted sum of source columns (kind="sum"),
+    or a 0/1 flag that the first source is positive (kind="positive").
+    """
+    name: str
+    sources: tuple
+    weights: tuple = ()
+    kind: str = "sum"
+
+    def compute(self, column):
+        """
+        Args:
+            column (callable): Returns the array of a source column by name.
+
+        Returns:
+            np.ndarray: The derived column.
+        """
+        if self.kind == "positive":
+            return (column(self.sources[0]) > 0).astype(int)
+        if self.kind != "sum":
+            raise ValueError(f"Unknown derived feature kind: {self.kind}")
+
+        # summed left to right, the same as the equivalent pandas expression
+        weights = self.weights or (1,) * len(self.sources)
+        result = weights[0] * column(self.sources[0])
+        for weight, source in zip(weights[1:], self.sources[1:]):
+            result = result + weight * column(source)
+        return result
+
+
+# domain features, in the order they are added to the frame
+FEATURE_SPEC = (
+    DerivedFeature("House_Age", ("Yr Sold", "Year Built"), (1, -1)),
+    DerivedFeature("Remod_Age", ("Yr Sold", "Year Remod/Add"), (1, -1)),
+    DerivedFeature(
+        "Total_Bathrooms",
+        ("Full Bath", "Half Bath", "Bsmt Full Bath", "Bsmt Half Bath"),
+        (1, 0.5, 1, 0.5)
+    ),
+    DerivedFeature("Total_SF", ("Total Bsmt SF", "1st Flr SF", "2nd Flr SF")),
+    DerivedFeature("Has_Garage", ("Garage Area",), kind="positive"),
+    DerivedFeature("Has_Basement", ("Total Bsmt SF",), kind="positive"),
+)
+
+DROP_COLUMNS = ("Year Built", "Year Remod/Add", "PID", "Order")
+
+
 class FeatureEngineering(BaseEstimator, TransformerMixin):
+    """
+    Adds the FEATURE_SPEC columns and drops DROP_COLUMNS.
+
+    Only the source columns are read, as NumPy views. The output frame
+    reuses the input's column arrays instead of copying the frame; with
+    in_place=True the caller's frame itself is modified and returned.
+    """
+
+    def __init__(self, feature_spec=None, drop_columns=None, in_place=False):
+        self.feature_spec = feature_spec
+        self.drop_columns = drop_columns
+        self.in_place = in_place
+
+    def resolved_spec(self):
+        """
+        The derived features and dropped columns this transformer applies
+        """
+        # pipelines pickled before the spec have no attributes at all
+        spec = getattr(self, "feature_spec", None)
+        drop = getattr(self, "drop_columns", None)
+        return (
+            FEATURE_SPEC if spec is None else spec,
+            DROP_COLUMNS if drop is None else drop,
+        )
 
     def fit(self, X, y=None):
         return self
@@ -16,34 +91,37 @@ class FeatureEngineering(BaseEstimator, TransformerMixin):
     def transform(self, X):
         try:
             logger.info("Applying feature engineering")
-            X = X.copy()
-
-            X["House_Age"] = X["Yr Sold"] - X["Year Built"]
-            X["Remod_Age"] = X["Yr Sold"] - X["Year Remod/Add"]
-
-            X["Total_Bathrooms"] = (
-                X["Full Bath"]
-                + 0.5 * X["Half Bath"]
-                + X["Bsmt Full Bath"]
-                + 0.5 * X["Bsmt Half Bath"]
-            )
-
-            X["Total_SF"] = (
-                X["Total Bsmt SF"]
-                + X["1st Flr SF"]
-                + X["2nd Flr SF"]
-            )
-
-            X["Has_Garage"] = (X["Garage Area"] > 0).astype(int)
-            X["Has_Basement"] = (X["Total Bsmt SF"] > 0).astype(int)
-
-            X.drop(
-                columns=["Year Built", "Year Remod/Add", "PID", "Order"],
-                errors="ignore",
-                inplace=True
-            )
-
-            return X
+            spec, drop_columns = self.resolved_spec()
+
+            sources = {}
+            def column(name):
+                if name not in sources:
+                    values = X[name].to_numpy()
+                    # request frames hold None in object columns; as NaN it
+                    # propagates the way pandas' masked object arithmetic does
+                    if values.dtype == object:
+                        values = values.astype(np.float64)
+                    sources[name] = values
+                return sources[name]
+
+            derived = {feature.name: feature.compute(column) for feature in spec}
+            dropped = [c for c in drop_columns if c in X.columns]
+
+            if getattr(self, "in_place", False):
+                for name, values in derived.items():
+                    X[name] = values
+                for name in dropped:
+                    # del splits the block instead of copying it, unlike drop()
+                    del X[name]
+                return X
+
+            # new frame over the input's column arrays: an existing column
+            # keeps its position, new ones are appended in spec order
+            data = {name: X[name].to_numpy() for name in X.columns}
+            data.update(derived)
+            for name in dropped:
+                del data[name]
+            return pd.DataFrame(data, index=X.index, copy=False)
 
         except Exception as e:
             raise CustomException(e, sys)
@@ -0,0 +1,193 @@
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+
+from src.utils.logger import get_logger
+from src.utils.exception import CustomException
+
+logger = get_logger(__name__)
+
+# histogram gradient boosting bins a categorical column into at most 255 codes
+MAX_NATIVE_CATEGORIES = 255
+
+
+class FusedPreprocessor(BaseEstimator, TransformerMixin):
+    """
+    Imputation, encoding and scaling as one fitted step, producing the same
+    features as the encoding -> imputation -> scaling ColumnTransformers:
+
+        [ordinal codes | one-hot flags | numeric columns], all standard scaled
+
+    Column roles are resolved from the frame's dtypes once, at fit, into an
+    index plan. transform then writes every column straight into a single
+    preallocated output matrix, imputes the numeric block and scales it in
+    place, so no intermediate matrices are built and nothing is re-sniffed.
+
+    Ordinal and one-hot lookups match the sklearn encoders: unknown values
+    (None included) encode to -1 / all zeros, NaN is a one-hot category of
+    its own if it was seen during fit. Only numeric columns can be missing
+    after encoding, so they are the only ones imputed (with the median);
+    numeric columns with no observed values are dropped, as SimpleImputer does.
+
+    With nominal_encoding="native", for gradient-boosted trees with native
+    categorical support, each nominal column is instead one column of
+    category codes (unknown values are NaN, i.e. missing) and nothing is
+    scaled: [ordinal codes | nominal codes | numeric columns].
+    categorical_mask_ flags the nominal code columns.
+    """
+
+    def __init__(self, ordinal_categories=None, nominal_encoding="onehot"):
+        self.ordinal_categories = ordinal_categories
+        self.nominal_encoding = nominal_encoding
+
+    @property
+    def native_(self) -> bool:
+        # pipelines pickled before nominal_encoding existed are one-hot
+        return getattr(self, "nominal_encoding", "onehot") == "native"
+
+    def __getstate__(self):
+        # lookup indexes are rebuilt on first use instead of being pickled
+        state = super().__getstate__()
+        state.pop("_indexes", None)
+        return state
+
+    def _lookups(self):
+        if getattr(self, "_indexes", None) is None:
+            self._indexes = [pd.Index(c) for c in self.ordinal_categories_ + self.nominal_categories_]
+        return self._indexes
+
+    def fit(self, X, y=None):
+        self._fit(X)
+        return self
+
+    def fit_transform(self, X, y=None):
+        try:
+            out = self._fit(X)
+            out -= self.mean_
+            out /= self.scale_
+            return out
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _fit(self, X):
+        try:
+            logger.info("Fitting fused preprocessor")
+            if self.nominal_encoding not in ("onehot", "native"):
+                raise ValueError(f"Unknown nominal encoding: {self.nominal_encoding}")
+            ordinal = dict(self.ordinal_categories or {})
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            self.n_features_in_ = len(self.feature_names_in_)
+
+            missing = [c for c in ordinal if c not in X.columns]
+            if missing:
+                raise ValueError(f"Ordinal columns not found: {missing}")
+
+            categorical = [c for c in X.columns if X[c].dtype == object]
+            self.ordinal_features_ = list(ordinal)
+            self.ordinal_categories_ = [np.asarray(ordinal[c], dtype=object) for c in self.ordinal_features_]
+            self.nominal_features_ = [c for c in categorical if c not in ordinal]
+            self.numeric_features_ = [
+                c for c in X.columns if c not in ordinal and c not in self.nominal_features_
+            ]
+
+            # sorted categories, with NaN last if seen: the OneHotEncoder order
+            self.nominal_categories_ = []
+            for c in self.nominal_features_:
+                values = pd.unique(X[c].to_numpy())
+                present = pd.isna(values)
+                categories = np.sort(values[~present])
+                if present.any():
+                    categories = np.append(categories, np.nan).astype(object)
+                self.nominal_categories_.append(categories)
+            self._indexes = None
+
+            statistics = SimpleImputer(strategy="median").fit(
+                X[self.numeric_features_].to_numpy(dtype=np.float64)
+            ).statistics_
+            keep = ~np.isnan(statistics)
+            self.statistics_ = statistics[keep]
+            self.numeric_kept_ = [c for c, k in zip(self.numeric_features_, keep) if k]
+
+            out = self._encode(X)
+            if self.native_:
+                # trees are scale invariant, and category codes must stay integers
+                self.mean_ = np.zeros(out.shape[1])
+                self.scale_ = np.ones(out.shape[1])
+            else:
+                scaler = StandardScaler().fit(out)
+                self.mean_, self.scale_ = scaler.mean_, scaler.scale_
+            return out
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @property
+    def n_features_out_(self) -> int:
+        if self.native_:
+            n_nominal = len(self.nominal_features_)
+        else:
+            n_nominal = sum(len(c) for c in self.nominal_categories_)
+        return len(self.ordinal_features_) + n_nominal + len(self.numeric_kept_)
+
+    @property
+    def categorical_mask_(self) -> np.ndarray:
+        """
+        Output columns holding native category codes, the categorical_features
+        mask of a gradient-boosting model; all False for one-hot output
+        """
+        mask = np.zeros(self.n_features_out_, dtype=bool)
+        if self.native_:
+            start = len(self.ordinal_features_)
+            mask[start:start + len(self.nominal_features_)] = [
+                len(c) <= MAX_NATIVE_CATEGORIES for c in self.nominal_categories_
+            ]
+        return mask
+
+    def _encode(self, X) -> np.ndarray:
+        """
+        Imputed, encoded and not yet scaled (n, n_features_out_) matrix
+        """
+        # column-major like the ColumnTransformer output: every column write is
+        # contiguous and the scaler statistics come out bit for bit the same
+        out = np.zeros((len(X), self.n_features_out_), order="F")
+        lookups = self._lookups()
+        rows = np.arange(len(X))
+
+        position = 0
+        for j, c in enumerate(self.ordinal_features_):
+            out[:, position] = lookups[j].get_indexer(X[c].to_numpy())
+            position += 1
+
+        n_ordinal = len(self.ordinal_features_)
+        native = self.native_
+        for j, c in enumerate(self.nominal_features_):
+            codes = lookups[n_ordinal + j].get_indexer(X[c].to_numpy())
+            known = codes >= 0
+            if native:
+                out[:, position] = np.where(known, codes, np.nan)
+                position += 1
+                continue
+            out[rows[known], position + codes[known]] = 1.0
+            position += len(self.nominal_categories_[j])
+
+        numeric = out[:, position:]
+        for j, c in enumerate(self.numeric_kept_):
+            numeric[:, j] = X[c].to_numpy()
+
+        missing = np.isnan(numeric)
+        if missing.any():
+            np.copyto(numeric, self.statistics_, where=missing)
+        return out
+
+    def transform(self, X):
+        try:
+            logger.info("Applying fused preprocessing")
+            out = self._encode(X)
+            out -= self.mean_
+            out /= self.scale_
+            return out
+        except Exception as e:
+            raise CustomException(e, sys)
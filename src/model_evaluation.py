@@ -2,19 +2,20 @@ import os
 import sys
 import json
 import joblib
-from typing import Dict
+from typing import Dict, Optional
 
 from src.utils.logger import get_logger
 from src.utils.exception import CustomException
 from src.utils.common import create_directories
+from src.utils.config import BASE_DIR
 
 logger = get_logger(__name__)
 
 
 class ModelEvaluation:
     def __init__(self):
-        self.model_dir = "artifacts/model"
-        self.report_dir = "artifacts/reports"
+        self.model_dir = os.path.join(BASE_DIR, "artifacts", "model")
+        self.report_dir = os.path.join(BASE_DIR, "artifacts", "reports")
 
         create_directories([self.model_dir, self.report_dir])
 
@@ -29,9 +30,11 @@ class ModelEvaluation:
         except Exception as e:
             raise CustomException(e, sys)
 
-    def save_metrics(self, metrics: Dict):
+    def save_metrics(self, metrics: Dict, metrics_path: Optional[str] = None):
         try:
-            metrics_path = os.path.join(self.report_dir, "model_metrics.json")
+            if metrics_path is None:
+                metrics_path = os.path.join(self.report_dir, "model_metrics.json")
+            os.makedirs(os.path.dirname(metrics_path), exist_ok=True)
 
             with open(metrics_path, "w") as f:
                 json.dump(metrics, f, indent=4)
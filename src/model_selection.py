@@ -1,13 +1,77 @@
 import sys
+import math
+import numpy as np
+from scipy import sparse
+from itertools import product
 from typing import Dict
 
+from joblib import Memory, Parallel, delayed, hash as joblib_hash
+from sklearn.base import clone
+from sklearn.metrics import r2_score, mean_squared_error
+from sklearn.model_selection import KFold
+from sklearn.utils import resample
+
 from src.utils.logger import get_logger
 from src.utils.exception import CustomException
+from src.utils.config import ModelSelectionConfig, ModelTrainingConfig
+from src.model_training import fit_input
 
 logger = get_logger(__name__)
 
 
+def _fold_score(estimator, params, fold, n_resources, data_key, X, y, n_splits, random_state, max_density=0.1):
+    """
+    Validation R2 of one configuration on one CV fold, trained on at most
+    n_resources rows of the fold's training part.
+    X and y are identified by data_key for caching.
+    """
+    folds = KFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    train_idx, val_idx = list(folds.split(X))[fold]
+    if n_resources < len(train_idx):
+        # a seeded random subset, as HalvingGridSearchCV draws: train_idx is in
+        # file order. The same seed on every rung, so larger rungs extend smaller ones
+        train_idx = np.sort(
+            resample(train_idx, replace=False, n_samples=n_resources, random_state=random_state)
+        )
+
+    model = clone(estimator).set_params(**params)
+    model.fit(fit_input(model, X[train_idx], max_density), y[train_idx])
+    return r2_score(y[val_idx], model.predict(fit_input(model, X[val_idx], max_density)))
+
+
+def _as_float_matrix(X):
+    # sparse encodings stay sparse, CSR for fast row indexing
+    if sparse.issparse(X):
+        return X.astype(np.float64).tocsr()
+    return np.asarray(X, dtype=np.float64)
+
+
 class ModelSelector:
+    # hyperparameter grids for search mode, keyed like ModelTrainer.models
+    param_grids = {
+        "LinearRegression": {},
+        "Ridge": {"alpha": [0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0]},
+        "Lasso": {"alpha": [0.01, 0.05, 0.1, 0.5, 1.0, 5.0]},
+        "RandomForest": {
+            "n_estimators": [100, 200],
+            "max_depth": [None, 12, 20],
+            "min_samples_leaf": [1, 2, 4],
+        },
+        "HistGradientBoosting": {
+            "learning_rate": [0.05, 0.1],
+            "max_leaf_nodes": [15, 31, 63],
+            "l2_regularization": [0.0, 1.0],
+        },
+        "XGBoost": {
+            "learning_rate": [0.05, 0.1],
+            "max_depth": [4, 6, 8],
+            "min_child_weight": [1.0, 5.0],
+        },
+    }
+
+    def __init__(self):
+        self.config = ModelSelectionConfig()
+
     def select_best_model(self, model_results: Dict[str, dict]):
         try:
             logger.info("Selecting best model based on test performance")
@@ -78,3 +142,104 @@ class ModelSelector:
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def _candidates(self, models: dict) -> list:
+        candidates = []
+        for name, estimator in models.items():
+            grid = self.param_grids.get(name, {})
+            keys = sorted(grid)
+            for values in product(*(grid[k] for k in keys)):
+                candidates.append((name, dict(zip(keys, values))))
+        return candidates
+
+    def search_best_model(self, models: dict, X_train, y_train, X_test, y_test):
+        """
+        K-fold CV search over param_grids with successive halving: every
+        rung trains on factor times more rows and keeps the best 1/factor
+        of the configurations. Returns the same
+        (best_model_name, best_model, metrics) contract as select_best_model,
+        with the winner refit on the full training data.
+        """
+        try:
+            X = _as_float_matrix(X_train)
+            y = np.asarray(y_train, dtype=np.float64)
+            config = self.config
+            factor = config.halving_factor
+
+            candidates = self._candidates(models)
+            n_samples = X.shape[0] * (config.n_splits - 1) // config.n_splits
+            n_rungs = max(1, math.ceil(math.log(len(candidates), factor)))
+
+            logger.info(
+                f"Searching {len(candidates)} configurations with "
+                f"{config.n_splits}-fold CV over {n_rungs} rungs"
+            )
+
+            max_density = ModelTrainingConfig().sparse_density_threshold
+
+            memory = Memory(config.cache_dir, verbose=0)
+            cached_fold_score = memory.cache(_fold_score, ignore=["X", "y"])
+            data_key = joblib_hash((X, y))
+
+            scores = {}
+            for rung in range(n_rungs):
+                n_resources = max(
+                    config.min_resources,
+                    int(n_samples / factor ** (n_rungs - 1 - rung))
+                )
+                n_resources = min(n_resources, n_samples)
+
+                fold_scores = Parallel(n_jobs=config.n_jobs)(
+                    delayed(cached_fold_score)(
+                        models[name], params, fold, n_resources, data_key, X, y,
+                        config.n_splits, config.random_state, max_density
+                    )
+                    for name, params in candidates
+                    for fold in range(config.n_splits)
+                )
+                fold_scores = np.array(fold_scores).reshape(len(candidates), config.n_splits)
+                scores = {
+                    i: float(fold_scores[i].mean()) for i in range(len(candidates))
+                }
+
+                ranked = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+                logger.info(
+                    f"Rung {rung}: {len(candidates)} configurations on {n_resources} rows, "
+                    f"best CV R2 {scores[ranked[0]]:.4f} "
+                    f"({candidates[ranked[0]][0]} {candidates[ranked[0]][1]})"
+                )
+
+                if rung < n_rungs - 1:
+                    keep = max(1, math.ceil(len(candidates) / factor))
+                    candidates = [candidates[i] for i in ranked[:keep]]
+
+            best = max(range(len(candidates)), key=lambda i: scores[i])
+            best_model_name, best_params = candidates[best]
+            cv_r2 = scores[best]
+
+            logger.info(f"Refitting {best_model_name} {best_params} on the full training data")
+            best_model = clone(models[best_model_name]).set_params(**best_params)
+            best_model.fit(fit_input(best_model, X, max_density), y)
+
+            y_test_pred = best_model.predict(
+                fit_input(best_model, _as_float_matrix(X_test), max_density)
+            )
+            test_r2 = r2_score(y_test, y_test_pred)
+            test_rmse = float(np.sqrt(mean_squared_error(y_test, y_test_pred)))
+
+            logger.info(
+                f"Best model selected: {best_model_name} with "
+                f"CV R2 = {cv_r2:.4f}, Test R2 = {test_r2:.4f}"
+            )
+
+            return best_model_name, best_model, {
+                "best_model_name": best_model_name,
+                "best_test_r2": test_r2,
+                "best_test_rmse": test_rmse,
+                "best_cv_r2": cv_r2,
+                "best_params": best_params,
+                "selection_criteria": "highest k-fold CV R2 after successive halving"
+            }
+
+        except Exception as e:
+            raise CustomException(e, sys)
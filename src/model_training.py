@@ -1,19 +1,147 @@
+import os
 import sys
+import time
 import numpy as np
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict
 
 from sklearn.linear_model import LinearRegression, Ridge, Lasso
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from sklearn.metrics import r2_score, mean_squared_error
+from threadpoolctl import threadpool_limits
 
 from src.utils.logger import get_logger
 from src.utils.exception import CustomException
+from src.utils.config import ModelTrainingConfig
+from src.boosting import XGBoostHistRegressor, xgboost
 
 logger = get_logger(__name__)
 
 
+def _reset_peak_rss() -> bool:
+    """
+    Resets the peak resident memory of the current process (VmHWM) to its
+    current RSS, so the next _peak_rss_mb() covers only what ran in between.
+    Linux only; returns False where unsupported
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _status_mb(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb():
+    """
+    Peak resident memory of the current process in MB since the last
+    _reset_peak_rss() (None where unsupported)
+    """
+    return _status_mb("VmHWM")
+
+
+# models whose solvers work on sparse input directly
+SPARSE_MODELS = (LinearRegression, Ridge, Lasso)
+
+# models that split category codes natively (categorical_features mask)
+NATIVE_CATEGORICAL_MODELS = (HistGradientBoostingRegressor, XGBoostHistRegressor)
+
+# multi-threaded through OpenMP without an n_jobs parameter; capped by threadpool_limits
+OPENMP_MODELS = (HistGradientBoostingRegressor,)
+
+# models that only accept dense input
+DENSE_ONLY_MODELS = (HistGradientBoostingRegressor,)
+
+
+def uses_native_categorical(model) -> bool:
+    return isinstance(model, NATIVE_CATEGORICAL_MODELS)
+
+
+def fit_input(model, X, max_density: float):
+    """
+    The matrix a model is fit and scored on. Sparse input stays sparse for
+    models with sparse solvers and for very sparse data; other models (tree
+    ensembles) get a dense copy, as sklearn's sparse tree splitter is slower
+    than the dense one unless most entries are zero. Models that only take
+    dense input always get a dense copy.
+
+    Args:
+        model: The estimator.
+        X: Dense array or scipy sparse matrix.
+        max_density (float): Densify above this fraction of stored entries.
+
+    Returns:
+        The matrix to use for the model.
+    """
+    if sparse.issparse(X) and not isinstance(model, SPARSE_MODELS):
+        density = X.nnz / max(X.shape[0] * X.shape[1], 1)
+        if density > max_density or isinstance(model, DENSE_ONLY_MODELS):
+            return X.toarray()
+    return X
+
+
+def _fit_and_evaluate(name, model, n_threads, X_train, y_train, X_test, y_test, max_density=0.1) -> dict:
+    """
+    Fits one model within its CPU budget and scores it.
+    Runs in a worker process when training in parallel.
+    """
+    X_train = fit_input(model, X_train, max_density)
+    X_test = fit_input(model, X_test, max_density)
+
+    params = model.get_params()
+    if "n_jobs" in params:
+        model.set_params(n_jobs=n_threads)
+
+    # the process peak is reset per fit: the parent or a pool worker may have
+    # fit a bigger model before, and ru_maxrss would report that one
+    isolated = _reset_peak_rss()
+    start_rss_mb = _status_mb("VmRSS")
+
+    start = time.perf_counter()
+    # caps BLAS / OpenMP threads so models sharing the machine don't oversubscribe it
+    with threadpool_limits(limits=n_threads):
+        model.fit(X_train, y_train)
+        y_train_pred = model.predict(X_train)
+        y_test_pred = model.predict(X_test)
+    fit_seconds = time.perf_counter() - start
+    peak_rss_mb = _peak_rss_mb() if isolated else None
+    # what this fit added on top of the data and models already in the process
+    fit_memory_mb = None
+    if peak_rss_mb is not None and start_rss_mb is not None:
+        fit_memory_mb = peak_rss_mb - start_rss_mb
+
+    # serving predicts one row at a time, so don't ship the training thread count
+    if "n_jobs" in params:
+        model.set_params(n_jobs=params["n_jobs"])
+
+    return {
+        "model": model,
+        "train_r2": r2_score(y_train, y_train_pred),
+        "test_r2": r2_score(y_test, y_test_pred),
+        "train_rmse": np.sqrt(mean_squared_error(y_train, y_train_pred)),
+        "test_rmse": np.sqrt(mean_squared_error(y_test, y_test_pred)),
+        "fit_seconds": fit_seconds,
+        "peak_rss_mb": peak_rss_mb,
+        "fit_memory_mb": fit_memory_mb,
+        "n_threads": n_threads,
+    }
+
+
 class ModelTrainer:
     def __init__(self):
+        self.config = ModelTrainingConfig()
         self.models = {
             "LinearRegression": LinearRegression(),
             "Ridge": Ridge(alpha=1.0),
@@ -24,50 +152,118 @@ class ModelTrainer:
             )
         }
 
+        if self.config.gradient_boosting:
+            # early stopping on a 10% validation fold of the training rows
+            self.models["HistGradientBoosting"] = HistGradientBoostingRegressor(
+                learning_rate=0.05,
+                max_iter=1000,
+                max_leaf_nodes=31,
+                l2_regularization=1.0,
+                early_stopping=True,
+                validation_fraction=0.1,
+                n_iter_no_change=30,
+                random_state=42
+            )
+            if self.config.xgboost and xgboost is not None:
+                self.models["XGBoost"] = XGBoostHistRegressor(random_state=42)
+
+    def native_models(self) -> list:
+        """
+        Names of the candidates that can train on native category codes
+        """
+        return [name for name, model in self.models.items() if uses_native_categorical(model)]
+
+    def _cpu_budgets(self, total_cpus: int) -> Dict[str, int]:
+        """
+        One core for each single-threaded model, the rest split between
+        models that can use several (those with an n_jobs parameter)
+        """
+        multi_threaded = [
+            name for name, model in self.models.items()
+            if "n_jobs" in model.get_params() or isinstance(model, OPENMP_MODELS)
+        ]
+        single_threaded = len(self.models) - len(multi_threaded)
+        spare = max(total_cpus - single_threaded, len(multi_threaded))
+
+        return {
+            name: max(1, spare // len(multi_threaded)) if name in multi_threaded else 1
+            for name in self.models
+        }
+
     def train_and_evaluate(
         self,
         X_train,
         y_train,
         X_test,
-        y_test
+        y_test,
+        native_inputs=None
     ) -> Dict[str, dict]:
+        """
+        Args:
+            native_inputs (tuple): Optional (X_train, X_test, categorical_mask)
+                with nominal columns as category codes; the candidates in
+                native_models() train on these instead of X_train / X_test.
 
+        Returns:
+            dict: Per model: fitted model, scores, fit time, peak memory and
+            "input" ("native" or "onehot"), the encoding it was trained on.
+        """
         try:
             logger.info("Starting model training")
+            start = time.perf_counter()
 
-            results = {}
+            total_cpus = self.config.n_cpus or os.cpu_count() or 1
+            budgets = self._cpu_budgets(total_cpus)
+            logger.info(f"CPU budgets ({total_cpus} cores): {budgets}")
 
+            inputs = {}
             for name, model in self.models.items():
-                logger.info(f"Training model: {name}")
+                if native_inputs is not None and uses_native_categorical(model):
+                    X_train_native, X_test_native, categorical_mask = native_inputs
+                    model.set_params(categorical_features=categorical_mask)
+                    inputs[name] = ("native", X_train_native, X_test_native)
+                else:
+                    inputs[name] = ("onehot", X_train, X_test)
 
-                model.fit(X_train, y_train)
-
-                y_train_pred = model.predict(X_train)
-                y_test_pred = model.predict(X_test)
-
-                train_r2 = r2_score(y_train, y_train_pred)
-                test_r2 = r2_score(y_test, y_test_pred)
+            results = {}
 
-                train_rmse = np.sqrt(mean_squared_error(y_train, y_train_pred))
-                test_rmse = np.sqrt(mean_squared_error(y_test, y_test_pred))
+            if self.config.parallel and total_cpus > 1 and len(self.models) > 1:
+                with ProcessPoolExecutor(max_workers=min(len(self.models), total_cpus)) as pool:
+                    futures = {
+                        name: pool.submit(
+                            _fit_and_evaluate, name, model, budgets[name],
+                            inputs[name][1], y_train, inputs[name][2], y_test,
+                            self.config.sparse_density_threshold
+                        )
+                        for name, model in self.models.items()
+                    }
+                    for name, future in futures.items():
+                        results[name] = future.result()
+            else:
+                for name, model in self.models.items():
+                    logger.info(f"Training model: {name}")
+                    results[name] = _fit_and_evaluate(
+                        name, model, budgets[name], inputs[name][1], y_train, inputs[name][2], y_test,
+                        self.config.sparse_density_threshold
+                    )
 
-                results[name] = {
-                    "model": model,
-                    "train_r2": train_r2,
-                    "test_r2": test_r2,
-                    "train_rmse": train_rmse,
-                    "test_rmse": test_rmse
-                }
+            for name in results:
+                results[name]["input"] = inputs[name][0]
 
+            for name, metrics in results.items():
+                # keep the fitted copy from the worker process
+                self.models[name] = metrics["model"]
                 logger.info(
                     f"{name} | "
-                    f"Train R2: {train_r2:.4f}, "
-                    f"Test R2: {test_r2:.4f}"
+                    f"Train R2: {metrics['train_r2']:.4f}, "
+                    f"Test R2: {metrics['test_r2']:.4f}, "
+                    f"Fit time: {metrics['fit_seconds']:.2f}s, "
+                    f"Peak RSS: {metrics['peak_rss_mb']} MB "
+                    f"(+{metrics['fit_memory_mb']} MB during the fit)"
                 )
 
-            logger.info("Model training completed")
+            logger.info(f"Model training completed in {time.perf_counter() - start:.2f}s")
             return results
 
         except Exception as e:
             raise CustomException(e, sys)
-
@@ -1,37 +1,117 @@
 import sys
+import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
 
 from src.utils.logger import get_logger
 from src.utils.exception import CustomException
+from src.utils.sketches import ReservoirSample, nan_quantiles
 
 logger = get_logger(__name__)
 
 
 class OutlierHandler(BaseEstimator, TransformerMixin):
+    """
+    Caps numeric columns to the IQR fences [Q1 - 1.5 IQR, Q3 + 1.5 IQR]
+    learned from the training data.
 
-    def __init__(self):
+    The bounds are stored as arrays aligned with `columns_` (`low_`, `high_`)
+    and applied with one broadcast clip over the numeric block.
+    method="exact" computes the quartiles with one vectorized sort of the block;
+    method="approximate" estimates them from a reservoir sample of
+    `sample_size` rows, and partial_fit does the same over chunks.
+    """
+
+    def __init__(self, method="exact", sample_size=10000, in_place=False, random_state=42):
+        self.method = method
+        self.sample_size = sample_size
+        self.in_place = in_place
+        self.random_state = random_state
         self.bounds = {}
 
+    def __getstate__(self):
+        # the partial_fit sample is not persisted with the fitted pipeline
+        state = super().__getstate__()
+        state.pop("_sketch", None)
+        return state
+
+    def _set_bounds(self, columns, q1, q3):
+        iqr = q3 - q1
+        self.columns_ = list(columns)
+        self.low_ = q1 - 1.5 * iqr
+        self.high_ = q3 + 1.5 * iqr
+
+        # per-column view of the same bounds
+        self.bounds = dict(zip(self.columns_, zip(self.low_, self.high_)))
+
     def fit(self, X, y=None):
         try:
             logger.info("Learning IQR bounds")
-            for col in X.select_dtypes(include=["int64", "float64"]).columns:
-                Q1 = X[col].quantile(0.25)
-                Q3 = X[col].quantile(0.75)
-                IQR = Q3 - Q1
-                self.bounds[col] = (Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
+            columns = X.select_dtypes(include=["int64", "float64"]).columns
+            block = X[columns].to_numpy(dtype=np.float64)
+
+            if self.method == "exact":
+                q1, q3 = nan_quantiles(block, [0.25, 0.75])
+            elif self.method == "approximate":
+                sketch = ReservoirSample(len(columns), self.sample_size, self.random_state)
+                sketch.update(block)
+                q1, q3 = sketch.quantiles([0.25, 0.75])
+            else:
+                raise ValueError(f"Unknown outlier fitting method: {self.method}")
+
+            self._set_bounds(columns, q1, q3)
             return self
         except Exception as e:
             raise CustomException(e, sys)
 
+    def partial_fit(self, X, y=None):
+        """
+        Updates the bounds with another chunk of training data. The quartiles
+        come from a reservoir sample of all chunks seen so far, so they are
+        exact until more than `sample_size` rows have been seen.
+        """
+        try:
+            if getattr(self, "_sketch", None) is None:
+                columns = X.select_dtypes(include=["int64", "float64"]).columns
+                self._sketch = ReservoirSample(len(columns), self.sample_size, self.random_state)
+                self.columns_ = list(columns)
+
+            self._sketch.update(X[self.columns_].to_numpy(dtype=np.float64))
+            q1, q3 = self._sketch.quantiles([0.25, 0.75])
+            self._set_bounds(self.columns_, q1, q3)
+            return self
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _bound_arrays(self):
+        if not hasattr(self, "low_"):
+            # handlers pickled before the array layout only have the bounds dict
+            columns = list(self.bounds)
+            low = np.array([self.bounds[c][0] for c in columns], dtype=np.float64)
+            high = np.array([self.bounds[c][1] for c in columns], dtype=np.float64)
+        else:
+            columns, low, high = self.columns_, self.low_, self.high_
+
+        # a column with no observed values has NaN bounds, which do not clip
+        return columns, np.nan_to_num(low, nan=-np.inf), np.nan_to_num(high, nan=np.inf)
+
     def transform(self, X):
         try:
             logger.info("Applying outlier capping")
-            X = X.copy()
-            for col, (low, high) in self.bounds.items():
-                if col in X.columns:
-                    X[col] = X[col].clip(low, high)
+            columns, low, high = self._bound_arrays()
+
+            positions = X.columns.get_indexer(columns)
+            present = positions >= 0
+            if not present.all():
+                positions, low, high = positions[present], low[present], high[present]
+
+            block = X.iloc[:, positions].to_numpy(dtype=np.float64)
+            np.clip(block, low, high, out=block)
+
+            # in place: the caller's frame gets the capped columns, no frame copy
+            if not getattr(self, "in_place", False):
+                X = X.copy(deep=False)
+            X.isetitem(list(positions), block)
             return X
         except Exception as e:
             raise CustomException(e, sys)
@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+import shutil
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+from src.utils.exception import CustomException
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA_FILE = "schema.json"
+FORMAT_VERSION = 2
+
+
+class ColumnarWriter:
+    """
+    Writes a columnar dataset chunk by chunk: one raw binary file per column
+    plus a schema.json sidecar with the column names, the explicit dtype
+    map and the category vocabularies of string columns.
+
+    Numeric columns are appended as raw arrays so they can be memory-mapped.
+    String (object) columns are dictionary encoded as int32 codes, with -1 for
+    missing values. The vocabulary grows as new values arrive. Memory use
+    depends only on the chunk size and the vocabularies.
+
+    Columns listed in int_candidates are written as float64 and narrowed to
+    int64 on close if every chunk had them as integers. This is the same
+    rule pd.read_csv applies to a whole file.
+    """
+
+    def __init__(self, path: str, metadata: Optional[dict] = None, int_candidates=()):
+        self.path = path
+        self.metadata = metadata or {}
+        self.int_candidates = set(int_candidates)
+
+        self.tmp_path = f"{path}.tmp"
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        os.makedirs(self.tmp_path)
+
+        self.columns = None
+        self.n_rows = 0
+        self._files = {}
+        self._vocabularies = {}
+        self._integral = {}
+
+    def _init_columns(self, df: pd.DataFrame):
+        self.columns = []
+        for i, name in enumerate(df.columns):
+            dtype = df[name].dtype
+            # column names may contain "/" (e.g. "Year Remod/Add"), so files are numbered
+            column = {"name": name, "file": f"c{i:04d}.bin"}
+
+            if dtype == object:
+                column["dtype"] = "object"
+                storage = np.dtype(np.int32)
+                self._vocabularies[name] = {}
+            elif name in self.int_candidates:
+                column["dtype"] = "float64"
+                storage = np.dtype(np.float64)
+                self._integral[name] = True
+            elif isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+                column["dtype"] = str(dtype)
+                storage = dtype
+            else:
+                raise TypeError(f"Column '{name}' has unsupported dtype {dtype}")
+
+            column["storage"] = storage.str
+            self.columns.append(column)
+            self._files[name] = open(os.path.join(self.tmp_path, column["file"]), "wb")
+
+    def _encode(self, name: str, series: pd.Series) -> np.ndarray:
+        vocabulary = self._vocabularies[name]
+
+        if series.dtype != object:
+            # a chunk where a string column is entirely missing parses as float
+            if series.notna().any():
+                raise TypeError(f"Column '{name}' changed from text to {series.dtype}; declare its dtype")
+            return np.full(len(series), -1, dtype=np.int32)
+
+        for value in pd.unique(series.dropna()):
+            if not isinstance(value, str):
+                raise TypeError(f"Column '{name}' mixes strings with non-string values")
+            if value not in vocabulary:
+                vocabulary[value] = len(vocabulary)
+
+        return pd.Index(list(vocabulary)).get_indexer(series).astype(np.int32)
+
+    def append(self, df: pd.DataFrame):
+        """
+        Append the rows of a chunk. Every chunk must have the same columns.
+        """
+        try:
+            if self.columns is None:
+                self._init_columns(df)
+            elif list(df.columns) != [column["name"] for column in self.columns]:
+                raise ValueError("Chunk columns do not match the first chunk")
+
+            for column in self.columns:
+                name = column["name"]
+                series = df[name]
+
+                if name in self._vocabularies:
+                    values = self._encode(name, series)
+                else:
+                    if series.dtype == object:
+                        raise TypeError(f"Column '{name}' changed from numeric to text; declare its dtype")
+                    if name in self._integral:
+                        self._integral[name] &= series.dtype.kind in "iu"
+                    values = series.to_numpy(dtype=column["storage"])
+
+                np.ascontiguousarray(values).tofile(self._files[name])
+
+            self.n_rows += len(df)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _narrow_to_int(self, column: dict, block_rows: int = 1 << 20):
+        source = os.path.join(self.tmp_path, column["file"])
+        target = f"{source}.int"
+        values = np.memmap(source, dtype=np.float64, mode="r", shape=(self.n_rows,))
+        with open(target, "wb") as f:
+            for start in range(0, self.n_rows, block_rows):
+                values[start:start + block_rows].astype(np.int64).tofile(f)
+        del values
+        os.replace(target, source)
+
+        column["dtype"] = "int64"
+        column["storage"] = np.dtype(np.int64).str
+
+    def close(self) -> str:
+        """
+        Finish the dataset and move it into place, replacing any previous one.
+
+        Returns:
+            str: The dataset directory.
+        """
+        try:
+            for f in self._files.values():
+                f.close()
+
+            for column in self.columns or []:
+                name = column["name"]
+                if self._integral.get(name) and self.n_rows:
+                    self._narrow_to_int(column)
+                if name in self._vocabularies:
+                    column["categories"] = list(self._vocabularies[name])
+
+            schema = {
+                "format_version": FORMAT_VERSION,
+                "n_rows": self.n_rows,
+                "columns": self.columns or [],
+                "metadata": self.metadata,
+            }
+            with open(os.path.join(self.tmp_path, SCHEMA_FILE), "w") as f:
+                json.dump(schema, f, indent=2)
+
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.replace(self.tmp_path, self.path)
+
+            logger.info(f"Saved {self.n_rows} rows x {len(schema['columns'])} columns to {self.path}")
+            return self.path
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def save_columnar(df: pd.DataFrame, path: str, metadata: Optional[dict] = None) -> str:
+    """
+    Save a DataFrame as a columnar dataset (see ColumnarWriter).
+
+    Args:
+        df (pd.DataFrame): Data to save. The index is not stored.
+        path (str): Dataset directory, replaced if it already exists.
+        metadata (dict): Optional JSON-serializable values kept in the schema.
+
+    Returns:
+        str: The dataset directory.
+    """
+    try:
+        writer = ColumnarWriter(path, metadata=metadata)
+        writer.append(df)
+        return writer.close()
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_schema(path: str) -> Optional[dict]:
+    """
+    Read the schema sidecar of a columnar dataset.
+
+    Args:
+        path (str): Dataset directory.
+
+    Returns:
+        dict: The schema, or None if the directory holds no dataset.
+    """
+    try:
+        with open(os.path.join(path, SCHEMA_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_columnar(path: str, columns: Optional[list] = None, mmap_mode: Optional[str] = "c") -> pd.DataFrame:
+    """
+    Load a columnar dataset written by save_columnar.
+
+    Numeric columns are memory-mapped and wrapped without copying. The
+    default "c" mode maps them copy-on-write, so in-place edits stay private
+    to the process and never reach the file. String columns are rebuilt from
+    their codes with one vectorized lookup, so no values are parsed.
+
+    Args:
+        path (str): Dataset directory.
+        columns (list): Optional subset of columns to load, in the order given.
+        mmap_mode (str): np.load mmap mode, or None to read into memory.
+
+    Returns:
+        pd.DataFrame: The dataset with its saved dtypes and a RangeIndex.
+    """
+    try:
+        schema = read_schema(path)
+        if schema is None:
+            raise FileNotFoundError(f"No columnar dataset found at {path}")
+
+        by_name = {column["name"]: column for column in schema["columns"]}
+        selected = [by_name[name] for name in columns] if columns is not None else schema["columns"]
+
+        data = {}
+        for column in selected:
+            file_path = os.path.join(path, column["file"])
+            if file_path.endswith(".npy"):
+                # datasets written before the raw binary layout
+                values = np.load(file_path, mmap_mode=mmap_mode)
+            elif mmap_mode is not None and schema["n_rows"] > 0:
+                values = np.memmap(file_path, dtype=column["storage"], mode=mmap_mode, shape=(schema["n_rows"],))
+            else:
+                values = np.fromfile(file_path, dtype=column["storage"])
+            # a plain ndarray view of the mapping, so pandas never sees np.memmap
+            values = values.view(np.ndarray)
+
+            if "categories" in column:
+                # the extra slot at the end turns code -1 into NaN
+                lookup = np.empty(len(column["categories"]) + 1, dtype=object)
+                lookup[:-1] = column["categories"]
+                lookup[-1] = np.nan
+                values = lookup[values]
+
+            data[column["name"]] = values
+
+        # copy=False keeps one block per column backed by the mapped file
+        return pd.DataFrame(data, columns=[c["name"] for c in selected], copy=False)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def read_table(path: str, columns: Optional[list] = None) -> pd.DataFrame:
+    """
+    Load a dataset from either a columnar directory or a CSV import file.
+
+    Args:
+        path (str): Columnar dataset directory or .csv file.
+        columns (list): Optional subset of columns to load.
+
+    Returns:
+        pd.DataFrame: The loaded data.
+    """
+    try:
+        if os.path.isdir(path):
+            return load_columnar(path, columns=columns)
+        return pd.read_csv(path, usecols=columns)
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -1,8 +1,10 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
-# Project root: house_price_prediction
-BASE_DIR = os.path.dirname(
+# Project root: house_price_prediction. HOUSE_PRICE_BASE_DIR points the
+# artifact paths somewhere else, e.g. a scratch directory for benchmarks
+BASE_DIR = os.environ.get("HOUSE_PRICE_BASE_DIR") or os.path.dirname(
     os.path.dirname(
         os.path.dirname(os.path.abspath(__file__))
     )
@@ -18,16 +20,144 @@ class DataIngestionConfig:
 class DataPreprocessingConfig:
     processed_data_path: str = os.path.join(BASE_DIR, "data", "processed", "processed.csv")
 
+@dataclass
+class EncodingConfig:
+    # impute -> encode -> scale in one step with a CSR one-hot block
+    sparse_onehot: bool = False
+
 @dataclass
 class ModelTrainingConfig:
     model_path: str = os.path.join(BASE_DIR, "artifacts", "model.pkl")
+    # train candidate models concurrently in a process pool
+    parallel: bool = True
+    # cores to split between the candidates (None = all)
+    n_cpus: Optional[int] = None
+    # with sparse encodings, models without sparse solvers get a dense copy
+    # when more than this fraction of the entries is stored
+    sparse_density_threshold: float = 0.1
+    # histogram gradient boosting candidates (XGBoost only if it is installed)
+    gradient_boosting: bool = True
+    xgboost: bool = True
+    # boosting candidates train on category codes instead of the one-hot block
+    native_categorical: bool = True
+
+@dataclass
+class StageCacheConfig:
+    # reuse outputs of unchanged training pipeline phases between runs
+    enabled: bool = True
+    cache_dir: str = os.path.join(BASE_DIR, "artifacts", "cache", "stages")
+    keep_per_stage: int = 3
+
+@dataclass
+class ModelSelectionConfig:
+    # k-fold CV search with successive halving instead of the fixed candidates
+    search: bool = False
+    n_splits: int = 5
+    halving_factor: int = 3
+    min_resources: int = 200
+    n_jobs: int = -1
+    random_state: int = 42
+    # fold scores are cached here so a widened grid only evaluates new points
+    cache_dir: str = os.path.join(BASE_DIR, "artifacts", "cache", "model_selection")
 
 @dataclass
 class PreprocessorConfig:
     preprocessor_path: str = os.path.join(BASE_DIR, "artifacts", "preprocessor.pkl")
 
+@dataclass
+class InputDefaultsConfig:
+    defaults_path: str = os.path.join(BASE_DIR, "artifacts", "input_defaults.pkl")
+    conditional_path: str = os.path.join(BASE_DIR, "artifacts", "input_defaults_by_group.pkl")
+    # per-group numeric defaults for requests that give this field; None disables them
+    group_by: Optional[str] = "Neighborhood"
+    min_group_size: int = 10
+
+@dataclass
+class CompactExportConfig:
+    # also save the trained pipeline as a pickle-free .npz (pipeline/compact_artifact.py)
+    enabled: bool = True
+    path: str = os.path.join(BASE_DIR, "artifacts", "model", "full_pipeline.npz")
+    # forest leaf values: "float64", "float32" or "uint16" (16-bit quantized);
+    # thresholds are float32 in every mode, which leaves the splits unchanged
+    precision: str = "float32"
+
 @dataclass
 class PredictionConfig:
+    # a .npz path loads the compact artifact instead of the pickle
     model_path: str = os.path.join(
         BASE_DIR, "artifacts", "model", "full_pipeline.pkl"
     )
+    input_defaults_path: str = os.path.join(BASE_DIR, "artifacts", "input_defaults.pkl")
+    conditional_defaults_path: str = os.path.join(BASE_DIR, "artifacts", "input_defaults_by_group.pkl")
+    # None loads arrays into memory; "r" memory-maps them read-only
+    mmap_mode: Optional[str] = None
+    metrics_path: str = os.path.join(BASE_DIR, "artifacts", "reports", "model_metrics.json")
+    max_batch_size: int = 10000
+    use_compiled_predictor: bool = False
+    # flatten RandomForest / ExtraTrees models into packed node arrays at load;
+    # batches larger than forest_max_batch_rows use sklearn's predict
+    compile_forest: bool = True
+    forest_max_batch_rows: int = 128
+
+@dataclass
+class PredictionCacheConfig:
+    enabled: bool = False
+    max_entries: int = 10000
+    max_bytes: int = 16 * 1024 * 1024
+    ttl_seconds: float = 300.0
+    # "memory" (per process) or "sqlite" (shared by all workers on the host)
+    backend: str = "memory"
+    sqlite_path: str = os.path.join(BASE_DIR, "artifacts", "cache", "predictions.sqlite")
+    # a SQLite hit rewrites its access time (for LRU) at most this often
+    sqlite_touch_seconds: float = 10.0
+
+@dataclass
+class ServingConfig:
+    # opt-in micro-batching of /predict requests
+    micro_batching: bool = False
+    max_batch_size: int = 64
+    max_wait_ms: float = 5.0
+    max_queue_size: int = 10000
+    # hot-reload full_pipeline.pkl when it changes on disk
+    watch_model: bool = False
+    watch_interval_seconds: float = 5.0
+    # pre-fork launcher (python main.py); workers=None uses one per CPU
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: Optional[int] = None
+    threads_per_worker: int = 1
+    graceful_timeout_seconds: float = 30.0
+
+@dataclass
+class MetricsConfig:
+    # per-stage timers, counters and GET /metrics (Prometheus text format)
+    enabled: bool = True
+    # main.py --workers: each worker snapshots its metrics here so /metrics
+    # sums all workers; cleared when the launcher starts
+    multiprocess_dir: str = os.path.join(BASE_DIR, "artifacts", "cache", "metrics")
+    snapshot_seconds: float = 1.0
+
+@dataclass
+class LoggingConfig:
+    log_dir: str = os.path.join(BASE_DIR, "logs")
+    # one file, rotated by size and by age, keeping backup_count old files
+    file_name: str = "house_price.log"
+    max_bytes: int = 10 * 1024 * 1024
+    rotate_seconds: float = 24 * 3600
+    backup_count: int = 5
+    level: str = "INFO"
+    # one JSON object per line; False keeps the "[time] LEVEL - message" lines
+    json_format: bool = True
+    # records waiting for the writer thread; beyond this they are dropped
+    queue_size: int = 10000
+    # the writer flushes when the queue runs empty or after this many records
+    flush_every: int = 256
+    # keep 1 in N records of these levels from the request-path modules
+    sample_every: dict = field(default_factory=lambda: {"DEBUG": 100, "INFO": 100})
+    sampled_loggers: tuple = (
+        "pipeline.prediction_pipeline",
+        "pipeline.compiled_predictor",
+        "src.feature_engineering",
+        "src.outlier_handling",
+        "src.fused_preprocessing",
+    )
@@ -1,15 +1,194 @@
+import os
+import sys
+from typing import Optional
+import numpy as np
 import pandas as pd
 import joblib
 
-def compute_defaults(train_csv_path, save_path):
-    df = pd.read_csv(train_csv_path)
+from src.utils.columnar import read_table
+from src.utils.exception import CustomException
+from src.utils.logger import get_logger
 
-    defaults = {}
+logger = get_logger(__name__)
 
-    for col in df.columns:
-        if df[col].dtype in ["int64", "float64"]:
-            defaults[col] = df[col].median()
-        else:
-            defaults[col] = df[col].mode()[0]
 
-    joblib.dump(defaults, save_path)
+class ConditionalDefaults:
+    """
+    Per-group medians of the numeric columns (e.g. per Neighborhood), kept
+    as one (n_groups, n_columns) float64 table. Groups too small to give a
+    stable median are left out and take the global defaults instead.
+    """
+
+    def __init__(self, key: str, groups: list, columns: list, values: np.ndarray):
+        self.key = key
+        self.groups = list(groups)
+        self.columns = list(columns)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_index", None)
+        return state
+
+    def codes(self, group_values) -> np.ndarray:
+        """
+        Table row of every group value, -1 for values without a row
+        """
+        if getattr(self, "_index", None) is None:
+            self._index = pd.Index(self.groups)
+        return self._index.get_indexer(group_values)
+
+    def plan(self, columns: list):
+        """
+        Args:
+            columns (list): Columns of the block the defaults are written into.
+
+        Returns:
+            tuple: (table column indices, block column positions) of the shared columns.
+        """
+        position = {c: i for i, c in enumerate(columns)}
+        shared = [i for i, c in enumerate(self.columns) if c in position]
+        return np.array(shared, dtype=np.intp), np.array([position[self.columns[i]] for i in shared], dtype=np.intp)
+
+    def fill(self, block: np.ndarray, plan: tuple, group_values) -> None:
+        """
+        Overwrites the planned columns of the rows whose group value has a row in the table.
+
+        Args:
+            block (np.ndarray): (n, columns) defaults block, modified in place.
+            plan (tuple): Result of plan() for the block's columns.
+            group_values (list): The group value of each of the n rows.
+        """
+        table_columns, positions = plan
+        codes = self.codes(group_values)
+        rows = np.flatnonzero(codes >= 0)
+        if len(rows) and len(positions):
+            block[np.ix_(rows, positions)] = self.values[np.ix_(codes[rows], table_columns)]
+
+
+def defaults_from_frame(df: pd.DataFrame) -> dict:
+    """
+    Training medians of numeric columns and modes of the others, in column
+    order, each computed with one call over the whole block.
+
+    Args:
+        df (pd.DataFrame): Training inputs.
+
+    Returns:
+        dict: Column name -> default value.
+    """
+    try:
+        numeric = df.select_dtypes(include=["int64", "float64"]).columns
+        other = df.columns.difference(numeric, sort=False)
+
+        medians = df[numeric].median()
+        # DataFrame.mode sorts tied values, so this picks the same value as mode()[0]
+        modes = df[other].mode().iloc[0] if len(other) else pd.Series(dtype=object)
+
+        return {col: medians[col] if col in medians.index else modes[col] for col in df.columns}
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def conditional_defaults(df: pd.DataFrame, key: str, min_group_size: int = 10) -> ConditionalDefaults:
+    """
+    Per-group medians of the numeric columns.
+
+    Args:
+        df (pd.DataFrame): Training inputs.
+        key (str): Column to group by, e.g. "Neighborhood".
+        min_group_size (int): Groups with fewer rows fall back to the global defaults.
+
+    Returns:
+        ConditionalDefaults: The lookup table. Cells without an observed value
+        in their group hold the global median.
+    """
+    try:
+        numeric = df.select_dtypes(include=["int64", "float64"]).columns.tolist()
+        grouped = df.groupby(key, sort=True)
+
+        sizes = grouped.size()
+        medians = grouped[numeric].median().loc[sizes.index[sizes >= min_group_size]]
+        values = medians.to_numpy(dtype=np.float64)
+
+        missing = np.isnan(values)
+        if missing.any():
+            global_medians = df[numeric].median().to_numpy(dtype=np.float64)
+            values[missing] = np.broadcast_to(global_medians, values.shape)[missing]
+
+        logger.info(f"Conditional defaults by '{key}': {len(medians)} of {len(sizes)} groups")
+        return ConditionalDefaults(key, medians.index.tolist(), numeric, values)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def _dump_atomic(obj, path: str):
+    # a reader never sees a half-written file
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def save_defaults(defaults: dict, save_path: str, conditional: Optional[ConditionalDefaults] = None,
+                  conditional_path: Optional[str] = None) -> None:
+    """
+    Writes the defaults, and the per-group table or the removal of a stale
+    one, each through a temp file and a rename.
+
+    Args:
+        defaults (dict): The global defaults.
+        save_path (str): Where the defaults dict is pickled.
+        conditional (ConditionalDefaults): Optional per-group defaults.
+        conditional_path (str): Where the per-group table is pickled.
+    """
+    try:
+        _dump_atomic(defaults, save_path)
+        logger.info(f"Input defaults saved at {save_path}")
+
+        if conditional_path is not None:
+            if conditional is not None:
+                _dump_atomic(conditional, conditional_path)
+                logger.info(f"Conditional input defaults saved at {conditional_path}")
+            elif os.path.exists(conditional_path):
+                # a stale table would otherwise still be picked up at serve time
+                os.remove(conditional_path)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def compute_defaults(train_data_path=None, save_path=None, df: Optional[pd.DataFrame] = None,
+                     group_by: Optional[str] = None, conditional_path: Optional[str] = None,
+                     min_group_size: int = 10) -> dict:
+    """
+    Computes and saves the defaults InputAdapter fills missing fields with.
+
+    Args:
+        train_data_path (str): Training data (columnar directory or CSV), read only if df is not given.
+        save_path (str): Where the defaults dict is pickled; nothing is saved when None.
+        df (pd.DataFrame): Training inputs already in memory.
+        group_by (str): Optional column to also compute per-group numeric defaults for.
+        conditional_path (str): Where the per-group table is pickled.
+        min_group_size (int): Smallest group that gets its own defaults.
+
+    Returns:
+        dict: The global defaults.
+    """
+    try:
+        if df is None:
+            df = read_table(train_data_path)
+
+        defaults = defaults_from_frame(df)
+        if save_path is not None:
+            conditional = None
+            if conditional_path is not None and group_by is not None:
+                conditional = conditional_defaults(df, group_by, min_group_size)
+            save_defaults(defaults, save_path, conditional, conditional_path)
+
+        return defaults
+
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -1,29 +1,310 @@
+import atexit
+import itertools
+import json
 import logging
-import os 
-from datetime import datetime 
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from src.utils.config import LoggingConfig
+from src.utils.metrics import LOG_RECORDS_DROPPED
+
+config = LoggingConfig()
 
 # create logs directory if it doesn't exist
-LOG_DIR = "logs"
+LOG_DIR = config.log_dir
 os.makedirs(LOG_DIR, exist_ok=True)
 
-# Log file name with timestamp
-LOG_FILE = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log"
-LOG_FILE_PATH = os.path.join(LOG_DIR, LOG_FILE)
+# one log file, rotated in place instead of a new file per process start
+LOG_FILE_PATH = os.path.join(LOG_DIR, config.file_name)
+
+TEXT_FORMAT = "[%(asctime)s] %(levelname)s - %(message)s"
+_exception_formatter = logging.Formatter()
+_DROPPED = LOG_RECORDS_DROPPED.labels()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, process and
+    thread, plus the exception when there is one.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotates when the file would grow past max_bytes or when it has been
+    open for rotate_seconds, keeping backup_count old files. The size is
+    tracked in memory instead of seeking the file and formatting every
+    record twice, and records are not flushed one by one: the queue
+    listener flushes once per batch.
+    """
+
+    def __init__(self, filename, max_bytes=0, rotate_seconds=0, backup_count=0, encoding="utf-8"):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.rotate_seconds = rotate_seconds
+        self._reset()
+
+    def _reset(self):
+        self._opened_at = time.time()
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+
+    def _should_rollover(self, size: int) -> bool:
+        if self.maxBytes > 0 and self._size and self._size + size > self.maxBytes:
+            return True
+        return self.rotate_seconds > 0 and self._size and time.time() - self._opened_at >= self.rotate_seconds
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = self.format(record) + self.terminator
+            if self._should_rollover(len(message)):
+                self.doRollover()
+                self._reset()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self._size += len(message)
+        except Exception:
+            self.handleError(record)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps 1 in N records per (logger, level) for the configured levels of
+    the configured loggers; the first record of each is always kept, and
+    levels without a rate (warnings, errors) are never sampled.
+    """
+
+    def __init__(self, sample_every: dict, loggers: tuple):
+        super().__init__()
+        self.sample_every = {logging.getLevelName(level): n for level, n in sample_every.items() if n > 1}
+        self.loggers = tuple(loggers)
+        self._counters = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = self.sample_every.get(record.levelno)
+        if every is None or not record.name.startswith(self.loggers):
+            return True
+        key = (record.name, record.levelno)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        # next() on itertools.count is atomic, so no lock is needed
+        return next(counter) % every == 0
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue without waiting; when the writer falls
+    behind, records are dropped and counted instead of blocking the caller
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # merge args now, while they still hold the caller's values; the final
+        # formatting (JSON or text) happens on the writer thread. The record is
+        # not copied: this is the only handler of every logger
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            _DROPPED.inc()
+        except ValueError:
+            # a shared queue closed by shutdown_logging in a forked worker
+            pass
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener that flushes its handlers only when the queue runs empty
+    or every flush_every records, so a burst is written in a few syscalls
+    """
+
+    def __init__(self, log_queue, *handlers, flush_every: int = 256, report_dropped: bool = True):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_every = flush_every
+        self.report_dropped = report_dropped
+        self._pending = 0
+        self._dropped_reported = 0
+
+    def _report_dropped(self):
+        # drops of this process's handler; forked workers' drops are in /metrics
+        if not self.report_dropped or _queue_handler is None:
+            return
+        dropped = _queue_handler.dropped
+        if dropped > self._dropped_reported:
+            record = logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"{dropped - self._dropped_reported} log records dropped, the log queue was full",
+            })
+            self._dropped_reported = dropped
+            for handler in self.handlers:
+                handler.handle(record)
+
+    def _flush(self):
+        self._report_dropped()
+        for handler in self.handlers:
+            handler.flush()
+        self._pending = 0
+
+    def dequeue(self, block):
+        if block and self._pending and self.queue.empty():
+            self._flush()
+        return super().dequeue(block)
+
+    def handle(self, record):
+        super().handle(record)
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self._flush()
+
+    def enqueue_sentinel(self):
+        # waits for room, unlike the base class, so a full queue cannot lose the stop signal
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        super().stop()
+        self._flush()
+
+
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+# set by share_log_writer(): forked workers put their records on _worker_queue,
+# which _worker_listener writes to this process's file handler
+_worker_queue = None
+_worker_listener = None
+
+
+def _file_handler() -> logging.Handler:
+    handler = SizeAndTimeRotatingFileHandler(
+        LOG_FILE_PATH,
+        max_bytes=config.max_bytes,
+        rotate_seconds=config.rotate_seconds,
+        backup_count=config.backup_count,
+    )
+    handler.setFormatter(JsonFormatter() if config.json_format else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def _start_listener():
+    global _listener
+    _listener = BatchingQueueListener(_queue_handler.queue, _file_handler(), flush_every=config.flush_every)
+    _listener.start()
+
+
+def shutdown_logging():
+    """
+    Writes out the queued records and stops the writer thread; get_logger
+    loggers keep queueing but nothing is written after this
+    """
+    global _listener, _worker_listener
+    if _worker_listener is not None:
+        _worker_listener.stop()
+        _worker_listener = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    elif _worker_queue is not None and _queue_handler is not None:
+        # forked worker: hand the records still buffered to the parent's writer
+        _worker_queue.close()
+        _worker_queue.join_thread()
+
+
+def share_log_writer():
+    """
+    Makes processes forked after this call send their records to this
+    process's file handler through a multiprocessing queue, instead of each
+    opening and rotating the log file on its own
+    """
+    global _worker_queue, _worker_listener
+    _queue_handler_instance()
+    with _lock:
+        if _worker_queue is not None:
+            return
+        # this process never puts on the queue, so its feeder thread state is
+        # still unused when a worker is forked
+        _worker_queue = multiprocessing.Queue(config.queue_size)
+        _worker_listener = BatchingQueueListener(
+            _worker_queue, *_listener.handlers, flush_every=config.flush_every, report_dropped=False
+        )
+        _worker_listener.start()
+
+
+def _after_fork_in_child():
+    # the writer threads do not survive fork()
+    global _listener, _worker_listener
+    if _queue_handler is None:
+        return
+    _listener = None
+    if _worker_queue is not None:
+        _worker_listener = None
+        _queue_handler.queue = _worker_queue
+        return
+    # a fresh queue (the parent's may hold records it will write itself) and own writer
+    _queue_handler.queue = queue.Queue(config.queue_size)
+    _start_listener()
+
+
+def _queue_handler_instance() -> logging.Handler:
+    """
+    The process-wide queue handler every module logger writes to, with its
+    writer thread started on first use
+    """
+    global _queue_handler
+    if _queue_handler is None:
+        with _lock:
+            if _queue_handler is None:
+                handler = NonBlockingQueueHandler(queue.Queue(config.queue_size))
+                handler.addFilter(SamplingFilter(config.sample_every, config.sampled_loggers))
+                _queue_handler = handler
+                _start_listener()
+                atexit.register(shutdown_logging)
+                os.register_at_fork(after_in_child=_after_fork_in_child)
+    return _queue_handler
+
 
 # Function to get logger
 def get_logger(name: str) -> logging.Logger:
     """Returns a logger instance with the specified name."""
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
+    logger.setLevel(config.level)
+
     # prevent logs from propagating
     logger.propagate = False
 
-    # Add a file handler to the logger if it doesn't have one
+    # every logger shares one queue handler; only its writer thread touches the file
     if not logger.handlers:
-        file_handler = logging.FileHandler(LOG_FILE_PATH)
-        formatter = logging.Formatter("[%(asctime)s] %(levelname)s - %(message)s")
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
-    return logger
\ No newline at end of file
+        logger.addHandler(_queue_handler_instance())
+
+    return logger
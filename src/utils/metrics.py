@@ -0,0 +1,502 @@
+import glob
+import json
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from time import perf_counter, sleep
+from typing import Callable, Optional
+
+from src.utils.config import MetricsConfig
+
+# 50us .. 10s on a 1-2.5-5 ladder: fine enough for p50/p95/p99 of both
+# sub-millisecond stages and whole batch requests
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def histogram_quantile(bounds: tuple, counts: list, q: float) -> float:
+    """
+    Estimates a quantile from non-cumulative bucket counts, interpolating
+    linearly inside the bucket that holds it (as Prometheus' histogram_quantile does)
+    """
+    total = sum(counts)
+    if total == 0:
+        return math.nan
+
+    rank = q * total
+    cumulative = 0
+    for i, n in enumerate(counts):
+        if cumulative + n >= rank and n:
+            if i == len(bounds):
+                # above the largest bound: the best estimate is that bound
+                return bounds[-1]
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - cumulative) / n
+        cumulative += n
+    return bounds[-1]
+
+
+def format_labels(labels: dict) -> str:
+    """
+    Args:
+        labels (dict): Label name -> value.
+
+    Returns:
+        str: The Prometheus label set, e.g. {stage="model"}, empty for no labels.
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(perf_counter() - self._start)
+        return False
+
+
+class _NullChild:
+    """
+    Stands in for every labelled metric when collection is disabled
+    """
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def observe(self, value: float):
+        pass
+
+    def time(self):
+        return _NULL_TIMER
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_CHILD = _NullChild()
+_NULL_TIMER = _NullTimer()
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def state(self) -> float:
+        return self.value
+
+    def reset(self):
+        with self._lock:
+            self.value = 0.0
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        # one slot per bucket plus the +Inf bucket, not cumulative
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        """
+        Context manager observing the seconds spent in its block
+        """
+        return _Timer(self)
+
+    def state(self) -> tuple:
+        """
+        (bucket counts, sum, count), read together
+        """
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.sum = 0.0
+            self.count = 0
+
+
+class _Family(ABC):
+    kind = ""
+
+    def __init__(self, registry, name: str, documentation: str, labelnames: tuple):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self):
+        """
+        A fresh child for one label set
+        """
+
+    def labels(self, *values):
+        """
+        The metric for one combination of label values; resolve it once
+        and keep it when the labels are fixed
+        """
+        if not self.registry.enabled:
+            return _NULL_CHILD
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def states(self) -> dict:
+        """
+        Label values -> state of every child
+        """
+        with self._lock:
+            items = list(self._children.items())
+        return {values: child.state() for values, child in items}
+
+    def reset(self):
+        with self._lock:
+            for child in self._children.values():
+                child.reset()
+
+    def _labels(self, values) -> dict:
+        return dict(zip(self.labelnames, values))
+
+    def render(self, states: Optional[dict] = None) -> list:
+        """
+        Exposition lines of this process's children, or of `states`
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return lines + self._samples(self.states() if states is None else states)
+
+    @abstractmethod
+    def merge(self, a, b):
+        """
+        One state holding what the states of two processes counted
+        """
+
+    @abstractmethod
+    def _samples(self, states: dict) -> list:
+        """
+        Exposition lines of every label set
+        """
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def merge(self, a, b):
+        return a + b
+
+    def _samples(self, states):
+        return [
+            f"{self.name}{format_labels(self._labels(values))} {_format_value(value)}"
+            for values, value in states.items()
+        ]
+
+
+class Histogram(_Family):
+    """
+    Bucketed histogram, rendered as a Prometheus histogram plus a
+    <name>_quantile gauge holding the estimated p50/p95/p99 per label set
+    """
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, quantiles=QUANTILES):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.quantiles = tuple(quantiles)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def render(self, states: Optional[dict] = None) -> list:
+        if states is None:
+            states = self.states()
+        lines = super().render(states)
+        if not self.quantiles:
+            return lines
+
+        name = f"{self.name}_quantile"
+        lines += [f"# HELP {name} Estimated quantiles of {self.name}", f"# TYPE {name} gauge"]
+        for values, (counts, _, count) in states.items():
+            if not count:
+                continue
+            for q in self.quantiles:
+                lines.append(
+                    f"{name}{format_labels({**self._labels(values), 'quantile': q})} "
+                    f"{_format_value(histogram_quantile(self.buckets, counts, q))}"
+                )
+        return lines
+
+    def merge(self, a, b):
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]
+
+    def _samples(self, states):
+        lines = []
+        for values, (counts, total, count) in states.items():
+            labels = self._labels(values)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                bucket_labels = format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics in the Prometheus text exposition format.
+
+    Counters and histograms are updated on the request path, under one small
+    lock per label set. Values that already live elsewhere (cache counters,
+    the loaded model) are read by collectors only when /metrics is scraped.
+    With enabled=False every metric is a no-op. Under the pre-fork launcher,
+    enable_multiprocess() makes every worker render the totals of all workers.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._families = {}
+        self._collectors = []
+        # set by enable_multiprocess()
+        self._multiprocess_dir = None
+        self._worker = None
+        self._snapshot_path = None
+        self._snapshot_lock = threading.Lock()
+
+    def _register(self, family: _Family) -> _Family:
+        existing = self._families.get(family.name)
+        if existing is not None:
+            return existing
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), **kwargs) -> Histogram:
+        return self._register(Histogram(self, name, documentation, labelnames, **kwargs))
+
+    def register_collector(self, collector: Callable[[], list]):
+        """
+        Args:
+            collector (callable): Returns (name, type, help, [(labels, value), ...])
+                tuples, called on every scrape.
+        """
+        self._collectors.append(collector)
+
+    def _collect(self) -> list:
+        return [sample for collector in self._collectors for sample in collector()]
+
+    def enable_multiprocess(self, directory: str, worker: int, snapshot_seconds: float = 1.0):
+        """
+        Shares this worker's metrics with the other workers of a pre-fork
+        server: a snapshot file in `directory` is rewritten every
+        snapshot_seconds and on every render(). render() then sums the
+        counters and histograms of all the files, those of exited workers
+        included so counters never go back, and reports the collector
+        values of each live worker under a `worker` label.
+
+        Values counted before this call (e.g. inherited from the parent
+        over fork) are reset so they are not counted once per worker.
+        """
+        for family in self._families.values():
+            family.reset()
+        os.makedirs(directory, exist_ok=True)
+        self._multiprocess_dir = directory
+        self._worker = worker
+        self._snapshot_path = os.path.join(directory, f"{worker}-{os.getpid()}.json")
+        self.write_snapshot()
+        threading.Thread(
+            target=self._snapshot_loop, args=(snapshot_seconds,), name="metrics-snapshot", daemon=True
+        ).start()
+
+    def _snapshot_loop(self, seconds: float):
+        while True:
+            sleep(seconds)
+            try:
+                self.write_snapshot()
+            except Exception:
+                # disk full or the directory removed: retried on the next tick
+                pass
+
+    def write_snapshot(self):
+        """
+        Writes this process's metric states to its snapshot file (tmp + rename,
+        so readers never see a partial file); a no-op outside multi-process mode
+        """
+        if self._snapshot_path is None:
+            return
+        data = {
+            "pid": os.getpid(),
+            "worker": self._worker,
+            "families": {
+                name: [[list(values), state] for values, state in family.states().items()]
+                for name, family in self._families.items()
+            },
+            "collected": self._collect(),
+        }
+        with self._snapshot_lock:
+            tmp_path = f"{self._snapshot_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._snapshot_path)
+
+    def _gather(self) -> tuple:
+        """
+        Family states and collector samples of every worker, from the snapshot files
+        """
+        self.write_snapshot()
+        states = {}
+        collected = {}
+        for path in sorted(glob.glob(os.path.join(self._multiprocess_dir, "*.json"))):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # removed between the listing and the read
+                continue
+
+            for name, entries in data["families"].items():
+                family = self._families.get(name)
+                if family is None:
+                    continue
+                merged = states.setdefault(name, {})
+                for values, state in entries:
+                    values = tuple(values)
+                    merged[values] = family.merge(merged[values], state) if values in merged else state
+
+            if not _alive(data["pid"]):
+                continue
+            for name, kind, documentation, samples in data["collected"]:
+                _, _, merged = collected.setdefault(name, (kind, documentation, []))
+                merged += [({"worker": data["worker"], **labels}, value) for labels, value in samples]
+        return states, [(name, *entry) for name, entry in collected.items()]
+
+    def render(self) -> str:
+        if self._multiprocess_dir is None:
+            states = {name: family.states() for name, family in self._families.items()}
+            collected = self._collect()
+        else:
+            states, collected = self._gather()
+
+        lines = []
+        for name, family in self._families.items():
+            lines += family.render(states.get(name, {}))
+        for name, kind, documentation, samples in collected:
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry(enabled=MetricsConfig().enabled)
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "house_price_stage_duration_seconds",
+    "Time spent in each prediction stage (adapter, pipeline steps, model)",
+    ("stage",)
+)
+PREDICTION_SECONDS = REGISTRY.histogram(
+    "house_price_prediction_duration_seconds",
+    "End-to-end prediction time per call, cache lookups included",
+    ("mode",)
+)
+BATCH_ROWS = REGISTRY.histogram(
+    "house_price_batch_rows",
+    "Records per batch prediction call",
+    buckets=SIZE_BUCKETS
+)
+PREDICTIONS = REGISTRY.counter(
+    "house_price_predictions_total",
+    "Records scored",
+    ("mode",)
+)
+PREDICTION_ERRORS = REGISTRY.counter(
+    "house_price_prediction_errors_total",
+    "Prediction calls that raised",
+    ("mode",)
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "house_price_http_requests_total",
+    "HTTP requests by route and status code",
+    ("method", "route", "status")
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "house_price_http_request_duration_seconds",
+    "HTTP request handling time by route",
+    ("method", "route")
+)
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "house_price_log_records_dropped_total",
+    "Log records dropped because the log queue was full"
+)
@@ -0,0 +1,196 @@
+import os
+import sys
+import json
+import math
+from collections import Counter
+import numpy as np
+import pandas as pd
+
+from src.utils.exception import CustomException
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def nan_quantiles(block: np.ndarray, q) -> np.ndarray:
+    """
+    Column-wise quantiles of a 2D block ignoring NaN, with the same linear
+    interpolation as np.nanquantile. Every column is sorted once, in a
+    single call, and all requested quantiles are read from that sort.
+    np.nanquantile instead loops over columns in Python once NaN is present.
+
+    Args:
+        block (np.ndarray): Shape (n_rows, n_columns).
+        q (list): Quantiles in [0, 1].
+
+    Returns:
+        np.ndarray: Shape (len(q), n_columns), NaN for all-missing columns.
+    """
+    # one contiguous row per column, sorted in place (NaN sorts last)
+    columns = np.array(np.asarray(block, dtype=np.float64).T, order="C")
+    columns.sort(axis=1)
+    q = np.asarray(q, dtype=np.float64)
+    counts = (~np.isnan(columns)).sum(axis=1)
+
+    position = q[:, None] * np.maximum(counts - 1, 0)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    t = position - lower
+
+    rows = np.arange(len(columns))
+    a = columns[rows, lower]
+    b = columns[rows, upper]
+
+    # numpy's lerp: interpolate from the nearer end for t >= 0.5
+    diff = b - a
+    result = a + diff * t
+    np.subtract(b, diff * (1 - t), out=result, where=t >= 0.5)
+
+    result[:, counts == 0] = np.nan
+    return result
+
+
+class ReservoirSample:
+    """
+    Uniform sample of up to `size` rows of a numeric block seen in chunks
+    (Algorithm R, vectorized per chunk). Quantiles of the sample estimate
+    the quantiles of the whole stream, and are exact while the stream holds
+    no more than `size` rows.
+    """
+
+    def __init__(self, n_columns: int, size: int = 10000, random_state: int = 42):
+        self.size = size
+        self.sample = np.empty((size, n_columns), dtype=np.float64)
+        self.n_seen = 0
+        self.rng = np.random.default_rng(random_state)
+
+    @property
+    def is_exact(self) -> bool:
+        return self.n_seen <= self.size
+
+    def update(self, block: np.ndarray):
+        block = np.asarray(block, dtype=np.float64)
+        n = len(block)
+
+        # fill the reservoir first
+        fill = min(max(self.size - self.n_seen, 0), n)
+        self.sample[self.n_seen:self.n_seen + fill] = block[:fill]
+
+        rest = block[fill:]
+        if len(rest):
+            # row t (0-based) replaces a random slot with probability size / (t + 1);
+            # for a repeated slot the later row wins, as in the sequential algorithm
+            positions = self.n_seen + fill + np.arange(len(rest))
+            slots = self.rng.integers(0, positions + 1)
+            keep = slots < self.size
+            self.sample[slots[keep]] = rest[keep]
+
+        self.n_seen += n
+
+    def quantiles(self, q) -> np.ndarray:
+        """
+        NaN-aware quantiles of every column, shape (len(q), n_columns)
+        """
+        return nan_quantiles(self.sample[:min(self.n_seen, self.size)], q)
+
+
+def _json_float(value):
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+class StreamingStats:
+    """
+    Running statistics of a table seen in chunks, kept in memory bounded by
+    the sample size and the category vocabularies:
+    counts, missing values, mean/min/max, quartiles and medians of numeric
+    columns (from a ReservoirSample) and value counts of string columns.
+    """
+
+    def __init__(self, sample_size: int = 10000, random_state: int = 42):
+        self.sample_size = sample_size
+        self.random_state = random_state
+
+        self.numeric_columns = None
+        self.categorical_columns = None
+        self.n_rows = 0
+
+    def _init_columns(self, df: pd.DataFrame):
+        self.numeric_columns = df.select_dtypes(include="number").columns.tolist()
+        self.categorical_columns = [c for c in df.columns if df[c].dtype == object]
+
+        n = len(self.numeric_columns)
+        self.missing = np.zeros(n, dtype=np.int64)
+        self.sums = np.zeros(n)
+        self.mins = np.full(n, np.nan)
+        self.maxs = np.full(n, np.nan)
+        self.reservoir = ReservoirSample(n, self.sample_size, self.random_state)
+        self.category_counts = {c: Counter() for c in self.categorical_columns}
+
+    def update(self, df: pd.DataFrame):
+        try:
+            if self.numeric_columns is None:
+                self._init_columns(df)
+            if len(df) == 0:
+                return
+
+            block = df[self.numeric_columns].to_numpy(dtype=np.float64)
+            self.missing += np.isnan(block).sum(axis=0)
+            self.sums += np.nansum(block, axis=0)
+            # fmin/fmax ignore NaN
+            self.mins = np.fmin(self.mins, np.fmin.reduce(block, axis=0))
+            self.maxs = np.fmax(self.maxs, np.fmax.reduce(block, axis=0))
+            self.reservoir.update(block)
+
+            for column in self.categorical_columns:
+                self.category_counts[column].update(df[column].value_counts().to_dict())
+
+            self.n_rows += len(df)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def summary(self) -> dict:
+        if self.numeric_columns is None:
+            return {"rows": 0, "numeric": {}, "categorical": {}}
+
+        q25, median, q75 = self.reservoir.quantiles([0.25, 0.5, 0.75])
+        counts = self.n_rows - self.missing
+
+        numeric = {}
+        for i, column in enumerate(self.numeric_columns):
+            numeric[column] = {
+                "count": int(counts[i]),
+                "missing": int(self.missing[i]),
+                "mean": _json_float(self.sums[i] / counts[i]) if counts[i] else None,
+                "min": _json_float(self.mins[i]),
+                "max": _json_float(self.maxs[i]),
+                "q25": _json_float(q25[i]),
+                "median": _json_float(median[i]),
+                "q75": _json_float(q75[i]),
+            }
+
+        categorical = {}
+        for column, counter in self.category_counts.items():
+            most_common = counter.most_common()
+            categorical[column] = {
+                "missing": int(self.n_rows - sum(counter.values())),
+                "mode": most_common[0][0] if most_common else None,
+                "counts": {value: int(count) for value, count in most_common},
+            }
+
+        return {
+            "rows": self.n_rows,
+            "exact_quantiles": self.reservoir.is_exact,
+            "numeric": numeric,
+            "categorical": categorical,
+        }
+
+    def save(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(self.summary(), f, indent=2)
+            logger.info(f"Training data statistics saved at {path}")
+        except Exception as e:
+            raise CustomException(e, sys)
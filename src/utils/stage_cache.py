@@ -0,0 +1,127 @@
+import os
+import sys
+import glob
+import time
+import hashlib
+import inspect
+import joblib
+
+from src.utils.exception import CustomException
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def file_fingerprint(file_path: str) -> str:
+    """
+    Content hash of a file, read in chunks.
+
+    Args:
+        file_path (str): Path of the file to hash.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def code_fingerprint(*objects) -> str:
+    """
+    Hash of the source files defining the given classes / functions, so a
+    cached stage is recomputed when its implementation changes.
+
+    Args:
+        objects: Classes or functions whose module source should be hashed.
+
+    Returns:
+        str: Hex digest of the source files.
+    """
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        for source_file in sorted({inspect.getsourcefile(obj) for obj in objects}):
+            with open(source_file, "rb") as file:
+                digest.update(file.read())
+        return digest.hexdigest()
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+class StageCache:
+    """
+    Content-addressed store for the outputs of training pipeline stages.
+
+    Each stage is keyed by the key of its input (the previous stage or the
+    raw data hash) plus its own parameters and code, and its outputs are
+    persisted with joblib under <cache_dir>/<stage>/<key>.joblib.
+    """
+
+    def __init__(self, cache_dir: str, enabled: bool = True, keep_per_stage: int = 3):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.keep_per_stage = keep_per_stage
+        self.report = []
+
+    def key(self, stage: str, *parts) -> str:
+        return joblib.hash((stage, parts))
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.cache_dir, stage, f"{key}.joblib")
+
+    def _prune(self, stage: str):
+        # keep only the most recently written entries of the stage
+        entries = sorted(
+            glob.glob(os.path.join(self.cache_dir, stage, "*.joblib")),
+            key=os.path.getmtime,
+            reverse=True
+        )
+        for stale in entries[self.keep_per_stage:]:
+            os.remove(stale)
+
+    def run(self, stage: str, key: str, compute):
+        """
+        Returns the cached outputs of the stage for this key, or computes
+        and stores them.
+
+        Args:
+            stage (str): Stage name, used as the cache sub-directory.
+            key (str): Content key from StageCache.key.
+            compute (callable): Produces the stage outputs on a cache miss.
+
+        Returns:
+            The stage outputs.
+        """
+        try:
+            path = self._path(stage, key)
+            start = time.perf_counter()
+
+            if self.enabled and os.path.exists(path):
+                outputs = joblib.load(path)
+                hit = True
+            else:
+                outputs = compute()
+                hit = False
+                if self.enabled:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    tmp_path = f"{path}.tmp"
+                    joblib.dump(outputs, tmp_path)
+                    os.replace(tmp_path, path)
+                    self._prune(stage)
+
+            seconds = time.perf_counter() - start
+            self.report.append({"stage": stage, "cache_hit": hit, "seconds": seconds})
+            logger.info(
+                f"Stage [{stage}] {'cache hit' if hit else 'computed'} "
+                f"in {seconds:.3f}s (key {key[:12]})"
+            )
+            return outputs
+
+        except Exception as e:
+            logger.error(f"Error in pipeline stage [{stage}]")
+            raise CustomException(e, sys)
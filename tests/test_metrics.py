@@ -0,0 +1,87 @@
+import json
+import os
+
+from src.utils.metrics import MetricsRegistry
+
+
+def _sample(text, line_start):
+    values = [line.split()[-1] for line in text.splitlines() if line.startswith(line_start)]
+    assert len(values) == 1, values
+    return float(values[0])
+
+
+def _registry():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ("mode",))
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    return registry, counter, histogram
+
+
+def _other_worker(directory, worker, pid, requests, latencies):
+    """
+    Writes the snapshot file of another worker process
+    """
+    registry, counter, histogram = _registry()
+    counter.labels("single").inc(requests)
+    for value in latencies:
+        histogram.labels().observe(value)
+    registry.register_collector(lambda: [("cache_entries", "gauge", "Entries", [({}, 7)])])
+    registry._snapshot_path = os.path.join(directory, f"{worker}-{pid}.json")
+    registry._worker = worker
+    registry.write_snapshot()
+    # the snapshot of a process with this pid
+    with open(registry._snapshot_path) as f:
+        data = json.load(f)
+    data["pid"] = pid
+    with open(registry._snapshot_path, "w") as f:
+        json.dump(data, f)
+
+
+def test_single_process_render():
+    registry, counter, histogram = _registry()
+    counter.labels("single").inc(2)
+    histogram.labels().observe(0.05)
+    histogram.labels().observe(0.5)
+
+    text = registry.render()
+    assert _sample(text, 'requests_total{mode="single"}') == 2
+    assert _sample(text, 'latency_seconds_bucket{le="0.1"}') == 1
+    assert _sample(text, 'latency_seconds_bucket{le="+Inf"}') == 2
+    assert _sample(text, "latency_seconds_count") == 2
+
+
+def test_multiprocess_sums_all_workers(tmp_path):
+    registry, counter, histogram = _registry()
+    counter.labels("single").inc(5)
+    registry.enable_multiprocess(str(tmp_path), worker=0, snapshot_seconds=60)
+    # counted before enabling (e.g. in the parent before fork): not reported
+    assert counter.labels("single").value == 0
+
+    counter.labels("single").inc(3)
+    histogram.labels().observe(0.05)
+    _other_worker(str(tmp_path), 1, os.getpid(), 4, [0.5, 5.0])
+
+    text = registry.render()
+    assert _sample(text, 'requests_total{mode="single"}') == 7
+    assert _sample(text, 'latency_seconds_bucket{le="0.1"}') == 1
+    assert _sample(text, 'latency_seconds_bucket{le="1.0"}') == 2
+    assert _sample(text, "latency_seconds_count") == 3
+    assert _sample(text, 'cache_entries{worker="1"}') == 7
+
+
+def test_exited_workers_keep_counts_but_not_collector_values(tmp_path):
+    registry, counter, _ = _registry()
+    registry.enable_multiprocess(str(tmp_path), worker=0, snapshot_seconds=60)
+    counter.labels("single").inc(1)
+    # no process has this pid
+    _other_worker(str(tmp_path), 1, 2 ** 22 + 1, 10, [])
+
+    text = registry.render()
+    assert _sample(text, 'requests_total{mode="single"}') == 11
+    assert "cache_entries" not in text
+
+
+def test_disabled_registry_renders_no_samples():
+    registry = MetricsRegistry(enabled=False)
+    registry.counter("x_total", "X").labels().inc(1)
+    assert registry.render().splitlines() == ["# HELP x_total X", "# TYPE x_total counter"]
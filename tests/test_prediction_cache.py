@@ -0,0 +1,199 @@
+import multiprocessing
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+
+from pipeline.prediction_cache import (
+    PredictionCache, MemoryPredictionCache, SQLitePredictionCache, make_cache_key
+)
+from pipeline.prediction_pipeline import PredictionPipeline
+from src.utils.input_defaults import conditional_defaults, defaults_from_frame, save_defaults
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "memory":
+            return MemoryPredictionCache(**kwargs)
+        # record every access, so LRU order is exact as in the memory backend
+        kwargs.setdefault("touch_seconds", 0.0)
+        return SQLitePredictionCache(str(tmp_path / "predictions.sqlite"), **kwargs)
+    return make
+
+
+def _set_in_child(path, key, value):
+    SQLitePredictionCache(path).set(key, value)
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        PredictionCache()
+
+    class Partial(PredictionCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_cache_key_ignores_order_and_number_type():
+    assert make_cache_key({"a": 2, "b": None}) == make_cache_key({"b": float("nan"), "a": 2.0})
+    assert make_cache_key({"a": 2}) != make_cache_key({"a": 3})
+
+
+def test_get_set_and_clear(make_cache):
+    cache = make_cache()
+    assert cache.get("k") is None
+    cache.set("k", 1.5)
+    assert cache.get("k") == 1.5
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    cache.clear()
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_overwrite_keeps_one_entry(make_cache):
+    cache = make_cache()
+    cache.set("k", 1.0)
+    cache.set("k", 2.0)
+    assert cache.get("k") == 2.0
+    assert cache.stats()["entries"] == 1
+
+
+def test_ttl_expires_entries(make_cache):
+    cache = make_cache(ttl_seconds=0.05)
+    cache.set("k", 1.0)
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+
+
+def test_evicts_least_recently_used_by_entries(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.set("a", 1.0)
+    time.sleep(0.01)
+    cache.set("b", 2.0)
+    time.sleep(0.01)
+    cache.set("c", 3.0)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2.0 and cache.get("c") == 3.0
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_read_refreshes_lru_order(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.set("a", 1.0)
+    time.sleep(0.01)
+    cache.set("b", 2.0)
+    time.sleep(0.01)
+    assert cache.get("a") == 1.0
+    time.sleep(0.01)
+    cache.set("c", 3.0)
+
+    assert cache.get("a") == 1.0
+    assert cache.get("b") is None
+
+
+def test_byte_bound(make_cache):
+    probe = make_cache()
+    entry = probe._entry_size("k0", 0.0)
+    cache = make_cache(max_bytes=3 * entry)
+    for i in range(10):
+        cache.set(f"k{i}", float(i))
+        time.sleep(0.005)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 3 * entry
+    assert stats["entries"] == 3
+    assert cache.get("k9") == 9.0
+
+
+def test_sqlite_hits_do_not_write_within_touch_interval(tmp_path):
+    cache = SQLitePredictionCache(str(tmp_path / "predictions.sqlite"), touch_seconds=60)
+    cache.set("k", 1.0)
+    connection = cache._connection()
+    before = connection.total_changes
+    for _ in range(5):
+        assert cache.get("k") == 1.0
+    assert connection.total_changes == before
+
+
+def test_sqlite_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "predictions.sqlite")
+    cache = SQLitePredictionCache(path)
+
+    process = multiprocessing.get_context("spawn").Process(target=_set_in_child, args=(path, "k", 42.0))
+    process.start()
+    process.join(60)
+    assert process.exitcode == 0
+
+    assert cache.get("k") == 42.0
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.fixture
+def served_pipeline(tmp_path):
+    """
+    PredictionPipeline over a linear model of Lot Area and Overall Qual, with
+    per-Neighborhood defaults whose Lot Area medians differ from the global one
+    """
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "Neighborhood": ["Small"] * 20 + ["Large"] * 20,
+        "Lot Area": np.r_[rng.uniform(4000, 6000, 20), rng.uniform(14000, 16000, 20)],
+        "Overall Qual": rng.integers(3, 10, 40).astype(np.float64),
+    })
+    y = frame["Lot Area"] * 10 + frame["Overall Qual"] * 1000
+
+    numeric = ["Lot Area", "Overall Qual"]
+    pipeline = Pipeline(steps=[
+        ("select", ColumnTransformer([("numeric", "passthrough", numeric)])),
+        ("model", LinearRegression()),
+    ]).fit(frame, y)
+
+    prediction_pipeline = PredictionPipeline()
+    config = prediction_pipeline.config
+    config.model_path = str(tmp_path / "full_pipeline.pkl")
+    config.input_defaults_path = str(tmp_path / "input_defaults.pkl")
+    config.conditional_defaults_path = str(tmp_path / "input_defaults_by_group.pkl")
+    config.metrics_path = str(tmp_path / "model_metrics.json")
+    config.use_compiled_predictor = False
+    joblib.dump(pipeline, config.model_path)
+    save_defaults(
+        defaults_from_frame(frame), config.input_defaults_path,
+        conditional_defaults(frame, "Neighborhood"), config.conditional_defaults_path
+    )
+    return prediction_pipeline, float(frame["Lot Area"].median())
+
+
+def test_cache_keys_follow_group_defaults(served_pipeline, make_cache):
+    prediction_pipeline, global_lot_area = served_pipeline
+    sparse_record = {"Neighborhood": "Small", "Overall Qual": 7}
+    explicit_record = {**sparse_record, "Lot Area": global_lot_area}
+
+    prediction_pipeline.cache = None
+    expected = [prediction_pipeline.predict_results(r) for r in (sparse_record, explicit_record)]
+    # the sparse record is filled from the group's Lot Area, not the global one
+    assert expected[0] != pytest.approx(expected[1])
+
+    prediction_pipeline.cache = make_cache()
+    assert [prediction_pipeline.predict_results(r) for r in (sparse_record, explicit_record)] == \
+        pytest.approx(expected)
+    assert prediction_pipeline.predict_batch([explicit_record, sparse_record]) == \
+        pytest.approx(expected[::-1])
+